@@ -0,0 +1,65 @@
+"""Learner analytics admin endpoint for Vercel"""
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.analytics import get_learner_stats, rebuild_learner_stats
+from ..utils.resilience import DatabaseUnavailableError, resilient_read, resilient_write
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+async def handler(event, context):
+    """Handle read (GET) or reconciliation rebuild (POST) of learner analytics"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        if current_user.get("role") != "admin":
+            return error_response(403, "Admin access required")
+
+        # Learner analytics are materialized in MongoDB only
+        db = storage.database("admin")
+        if db is None:
+            return error_response(501, "Not supported by the configured storage backend")
+
+        # Handle GET request (read materialized aggregates)
+        if event.get('httpMethod') == 'GET':
+            return success_response(await resilient_read(lambda: get_learner_stats(db), "admin"))
+
+        # Handle POST request (rebuild aggregates from user_progress)
+        elif event.get('httpMethod') == 'POST':
+            return success_response(await resilient_write(lambda: rebuild_learner_stats(db), "admin"))
+
+        else:
+            return error_response(405, "Method not allowed")
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') not in ['GET', 'POST']:
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
@@ -0,0 +1,76 @@
+"""Bulk cohort onboarding endpoint for Vercel"""
+import base64
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.onboarding import MAX_REQUEST_IMPORT_ROWS, OnboardingError, import_users
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+# Content types accepted when no ?format= is given
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson"
+}
+
+async def handler(event, context):
+    """Handle bulk import of learners from CSV or NDJSON"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Work out the file format from ?format= or the Content-Type
+        params = event.get('queryStringParameters') or {}
+        content_type = (headers.get('content-type') or headers.get('Content-Type') or '').split(';')[0].strip()
+        import_format = params.get('format') or CONTENT_TYPE_FORMATS.get(content_type)
+        if not import_format:
+            return error_response(400, "Invalid input", "Send text/csv or application/x-ndjson, or set ?format=")
+
+        body = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        if current_user.get("role") != "admin":
+            return error_response(403, "Admin access required")
+
+        try:
+            # Larger files go through the command line import
+            report = await import_users(storage, body, import_format, MAX_REQUEST_IMPORT_ROWS)
+        except OnboardingError as e:
+            return error_response(400, "Invalid input", str(e))
+
+        return success_response(report)
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'POST':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
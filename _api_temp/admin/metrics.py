@@ -0,0 +1,55 @@
+"""Process metrics admin endpoint for Vercel"""
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.resilience import DatabaseUnavailableError, get_metrics as get_database_metrics
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import get_metrics as get_buffer_metrics, run_handler
+from ..utils import activity, analytics  # noqa: F401 - registers their buffers
+
+async def handler(event, context):
+    """Handle read of this process's write-behind and database counters"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        if current_user.get("role") != "admin":
+            return error_response(403, "Admin access required")
+
+        # Queue depth, flush latency and dropped writes per buffer, plus breaker state
+        return success_response({
+            "buffers": get_buffer_metrics(),
+            "database": get_database_metrics()
+        })
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'GET':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
@@ -1,11 +1,16 @@
 """User login endpoint for Vercel"""
-import asyncio
 from datetime import datetime, timedelta
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import authenticate_user, create_access_token, user_to_response
 from ..utils.models import UserLogin
-from ..utils.response import success_response, error_response
+from ..utils.rate_limit import (
+    LOGIN_IP_LIMIT, LOGIN_EMAIL_LIMIT, BCRYPT_RETRY_AFTER_SECONDS,
+    bcrypt_admission, check_rate_limits, client_ip
+)
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response, too_many_requests_response
+from ..utils.write_queue import run_handler
 
 async def handler(event, context):
     """Handle user login"""
@@ -20,11 +25,28 @@ async def handler(event, context):
         except Exception as e:
             return error_response(400, "Invalid input", str(e))
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
+        
+        # Rate limit by client IP and email before spending bcrypt time
+        ip, email = client_ip(event), user_credentials.email.lower()
+        retry_after = await check_rate_limits(storage.database("background"), [
+            (LOGIN_IP_LIMIT, ip),
+            (LOGIN_EMAIL_LIMIT, email)
+        ])
+        if retry_after:
+            return too_many_requests_response(retry_after, "Too many login attempts")
+        
+        # Shed load when too many password checks are already queued, or this client holds its share
+        clients = (f"ip:{ip}", f"email:{email}")
+        if not bcrypt_admission.try_acquire(clients):
+            return too_many_requests_response(BCRYPT_RETRY_AFTER_SECONDS, "Server busy, please retry")
         
         # Authenticate user
-        user = await authenticate_user(db, user_credentials.email, user_credentials.password)
+        try:
+            user = await authenticate_user(storage, user_credentials.email, user_credentials.password)
+        finally:
+            bcrypt_admission.release(clients)
         if not user:
             return error_response(401, "Incorrect email or password")
         
@@ -34,11 +56,8 @@ async def handler(event, context):
             data={"sub": str(user["_id"])}, expires_delta=access_token_expires
         )
         
-        # Update last login
-        await db.users.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"last_login": datetime.utcnow()}}
-        )
+        # Update last login (non-critical, written behind the response)
+        await storage.update_user(user["_id"], {"last_login": datetime.utcnow()}, background=True)
         
         response_data = {
             "access_token": access_token,
@@ -48,6 +67,8 @@ async def handler(event, context):
         
         return success_response(response_data)
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -61,4 +82,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
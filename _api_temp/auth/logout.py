@@ -1,20 +1,36 @@
 """User logout endpoint for Vercel"""
-import asyncio
+from datetime import datetime
 
-from ..utils.response import success_response, error_response
+from ..utils.storage import get_storage
+from ..utils.auth import decode_token
+from ..utils.revocation import revoke_token
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
 
 async def handler(event, context):
-    """Handle user logout (client-side token removal)"""
+    """Handle user logout (revokes the token until it expires)"""
     try:
-        # Get authorization header (just for validation)
+        # Get authorization header
         headers = event.get('headers', {})
         auth_header = headers.get('authorization') or headers.get('Authorization')
         
         if not auth_header or not auth_header.startswith('Bearer '):
             return error_response(401, "Missing or invalid authorization header")
         
+        # Extract token
+        token = auth_header.split(' ')[1]
+        
+        # Revoke the token; tokens issued without a jti can only expire
+        token_data = decode_token(token)
+        if token_data and token_data.get("jti"):
+            storage = await get_storage()
+            await revoke_token(storage.db, token_data["jti"], datetime.utcfromtimestamp(token_data["exp"]))
+        
         return success_response({"message": "Successfully logged out"})
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -28,4 +44,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
@@ -1,9 +1,10 @@
 """Get current user endpoint for Vercel"""
-import asyncio
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import get_current_user, user_to_response
-from ..utils.response import success_response, error_response
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
 
 async def handler(event, context):
     """Handle get current user"""
@@ -18,16 +19,18 @@ async def handler(event, context):
         # Extract token
         token = auth_header.split(' ')[1]
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
         
         # Get current user
-        current_user = await get_current_user(db, token)
+        current_user = await get_current_user(storage, token)
         if not current_user:
             return error_response(401, "Invalid token")
         
         return success_response(user_to_response(current_user))
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -41,4 +44,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
@@ -3,10 +3,15 @@ import asyncio
 from datetime import datetime
 from bson import ObjectId
 
-from ..utils.database import get_database
+from ..utils.storage import DuplicateEmailError, get_storage
 from ..utils.auth import get_password_hash, create_access_token, get_user_by_email, user_to_response
 from ..utils.models import UserCreate, TokenResponse
-from ..utils.response import success_response, error_response
+from ..utils.rate_limit import REGISTER_IP_LIMIT, BCRYPT_RETRY_AFTER_SECONDS, bcrypt_admission, check_rate_limits, client_ip
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response, too_many_requests_response
+from ..utils.analytics import analytics_recorder, record_new_learner
+from ..utils.onboarding import new_progress_document
+from ..utils.write_queue import run_handler
 
 async def handler(event, context):
     """Handle user registration"""
@@ -21,16 +26,28 @@ async def handler(event, context):
         except Exception as e:
             return error_response(400, "Invalid input", str(e))
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
+        
+        # Rate limit registrations by client IP
+        ip = client_ip(event)
+        retry_after = await check_rate_limits(storage.database("background"), [(REGISTER_IP_LIMIT, ip)])
+        if retry_after:
+            return too_many_requests_response(retry_after, "Too many registration attempts")
         
         # Check if user already exists
-        existing_user = await get_user_by_email(db, user_data.email)
+        existing_user = await get_user_by_email(storage, user_data.email)
         if existing_user:
             return error_response(400, "Email already registered")
         
-        # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        # Create new user (registering also counts as the first login)
+        clients = (f"ip:{ip}",)
+        if not bcrypt_admission.try_acquire(clients):
+            return too_many_requests_response(BCRYPT_RETRY_AFTER_SECONDS, "Server busy, please retry")
+        try:
+            hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+        finally:
+            bcrypt_admission.release(clients)
         user_dict = {
             "_id": ObjectId(),
             "email": user_data.email,
@@ -39,45 +56,26 @@ async def handler(event, context):
             "role": "learner",
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
-            "last_login": None
+            "last_login": datetime.utcnow()
         }
         
-        # Insert user into database
-        result = await db.users.insert_one(user_dict)
-        user_dict["_id"] = result.inserted_id
+        # Insert user (a concurrent registration can still win the unique email)
+        try:
+            user_id = await storage.insert_user(user_dict)
+        except DuplicateEmailError:
+            return error_response(400, "Email already registered")
+        user_dict["_id"] = user_id
         
         # Initialize user progress
-        progress_dict = {
-            "_id": ObjectId(),
-            "user_id": result.inserted_id,
-            "completed_sections": [],
-            "module_progress": {
-                "pm-basics": {"completed": False, "completed_at": None},
-                "discovery": {"completed": False, "completed_at": None},
-                "product-sense": {"completed": False, "completed_at": None},
-                "metrics": {"completed": False, "completed_at": None},
-                "ai-era": {"completed": False, "completed_at": None},
-                "tools": {"completed": False, "completed_at": None}
-            },
-            "assessment_scores": [],
-            "total_progress": 0.0,
-            "last_accessed_module": None,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        await db.user_progress.insert_one(progress_dict)
+        progress_dict = new_progress_document(user_id, datetime.utcnow())
+        await storage.insert_progress(progress_dict)
+        analytics_recorder.schedule(record_new_learner, storage.database("background"))
         
         # Create access token
         from datetime import timedelta
         access_token_expires = timedelta(hours=24)
         access_token = create_access_token(
-            data={"sub": str(result.inserted_id)}, expires_delta=access_token_expires
-        )
-        
-        # Update last login
-        await db.users.update_one(
-            {"_id": result.inserted_id},
-            {"$set": {"last_login": datetime.utcnow()}}
+            data={"sub": str(user_id)}, expires_delta=access_token_expires
         )
         
         response_data = {
@@ -88,6 +86,8 @@ async def handler(event, context):
         
         return success_response(response_data)
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -101,4 +101,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""Batch request endpoint for Vercel"""
+import asyncio
+import importlib
+import json
+from urllib.parse import parse_qsl
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user, set_request_user, reset_request_user
+from ..utils.models import BatchRequest
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+# Sub-request routes: path -> (handler module, allowed methods)
+BATCH_ROUTES = {
+    "/api/auth/me": ("..auth.me", ["GET"]),
+    "/api/progress": ("..progress.index", ["GET"]),
+    "/api/progress/section": ("..progress.section", ["POST"]),
+    "/api/progress/assessment": ("..progress.assessment", ["POST"]),
+    "/api/progress/sync": ("..progress.sync", ["POST"]),
+    "/api/progress/activity": ("..progress.activity", ["GET"]),
+    "/api/progress/recommendations": ("..progress.recommendations", ["GET"]),
+    "/api/tools/rice-calculation": ("..tools.rice-calculation", ["POST"]),
+    "/api/tools/rice-history": ("..tools.rice-history", ["GET"]),
+    "/api/tools/rice-what-if": ("..tools.rice-what-if", ["POST"]),
+    "/api/tools/user-story": ("..tools.user-story", ["GET", "POST"]),
+    "/api/tools/user-story/search": ("..tools.user-story-search", ["GET"]),
+}
+
+def get_route_handler(module_name):
+    """Import a sub-request handler (module names may contain dashes)"""
+    module = importlib.import_module(module_name, package=__package__)
+    return module.handler
+
+def item_headers(headers, item, index, batch_key=None):
+    """Headers for one sub-request, with its Idempotency-Key if it has one
+
+    An item's own idempotency_key wins; otherwise a batch Idempotency-Key
+    gives each item "<batch key>:<index>", so retrying the same batch
+    replays its writes instead of repeating them.
+    """
+    key = item.idempotency_key or (f"{batch_key}:{index}" if batch_key else None)
+    if not key:
+        return headers
+    return {**headers, "Idempotency-Key": key}
+
+async def run_sub_request(item, headers, context):
+    """Run a single sub-request and return its batch entry"""
+    # A query string in the path is merged with item.query (item.query wins)
+    path, _, query_string = item.path.partition('?')
+    route = BATCH_ROUTES.get(path.rstrip('/'))
+    method = item.method.upper()
+
+    if not route:
+        response = error_response(404, "Unknown batch path", item.path)
+    elif method not in route[1]:
+        response = error_response(405, "Method not allowed")
+    else:
+        sub_event = {
+            "httpMethod": method,
+            "path": path,
+            "headers": headers,
+            "queryStringParameters": {**dict(parse_qsl(query_string)), **(item.query or {})},
+            "body": json.dumps(item.body or {})
+        }
+        try:
+            response = await get_route_handler(route[0])(sub_event, context)
+        except Exception as e:
+            response = error_response(500, "Internal server error", str(e))
+
+    body = response.get("body")
+    return {
+        "id": item.id,
+        "status": response["statusCode"],
+        "body": json.loads(body) if body else None
+    }
+
+async def run_batch(items, headers, context, batch_key=None):
+    """Run consecutive reads concurrently and each write alone, in request order
+
+    Writes such as progress/section read a document and $set it back, so two
+    of them running at once would overwrite each other.
+    """
+    responses = []
+    reads = []
+    for index, item in enumerate(items):
+        if item.method.upper() == "GET":
+            reads.append(item)
+            continue
+        responses.extend(await asyncio.gather(*[run_sub_request(read, headers, context) for read in reads]))
+        reads = []
+        responses.append(await run_sub_request(item, item_headers(headers, item, index, batch_key), context))
+
+    responses.extend(await asyncio.gather(*[run_sub_request(read, headers, context) for read in reads]))
+    return responses
+
+async def handler(event, context):
+    """Handle batch of sub-requests with a single authentication"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Parse request body
+        body = json.loads(event.get('body', '{}'))
+
+        # Validate input (also enforces the batch size cap)
+        try:
+            batch = BatchRequest(**body)
+        except Exception as e:
+            return error_response(400, "Invalid input", str(e))
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Authenticate once for the whole batch
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        sub_headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+        # Sub-requests inherit the authenticated user
+        reset_token = set_request_user(token, current_user)
+        try:
+            batch_key = headers.get('idempotency-key') or headers.get('Idempotency-Key')
+            responses = await run_batch(batch.requests, sub_headers, context, batch_key)
+        finally:
+            reset_request_user(reset_token)
+
+        return success_response({"responses": responses})
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'POST':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
@@ -0,0 +1,85 @@
+"""Learning activity timeline endpoint for Vercel"""
+from datetime import datetime, timedelta
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.activity import get_activity_timeline
+from ..utils.resilience import DatabaseUnavailableError, resilient_read
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+DEFAULT_TIMELINE_DAYS = 7
+DEFAULT_TIMELINE_LIMIT = 100
+MAX_TIMELINE_LIMIT = 500
+MAX_TIMELINE_DAYS = 90
+
+async def handler(event, context):
+    """Handle get learning activity timeline"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Validate query parameters
+        params = event.get('queryStringParameters') or {}
+        try:
+            today = datetime.utcnow().date()
+            end_day = datetime.strptime(params['to'], "%Y-%m-%d").date() if params.get('to') else today
+            start_day = (
+                datetime.strptime(params['from'], "%Y-%m-%d").date() if params.get('from')
+                else end_day - timedelta(days=DEFAULT_TIMELINE_DAYS - 1)
+            )
+            limit = min(int(params.get('limit', DEFAULT_TIMELINE_LIMIT)), MAX_TIMELINE_LIMIT)
+            if limit < 1:
+                raise ValueError("limit must be positive")
+            if not timedelta(0) <= end_day - start_day < timedelta(days=MAX_TIMELINE_DAYS):
+                raise ValueError(f"from must be on or before to, and at most {MAX_TIMELINE_DAYS} days earlier")
+        except ValueError as e:
+            return error_response(400, "Invalid input", str(e))
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        # Only the MongoDB backend can serve this endpoint
+        db = storage.database("history")
+        if db is None:
+            return error_response(501, "Not supported by the configured storage backend")
+
+        events = await resilient_read(lambda: get_activity_timeline(
+            db,
+            current_user["_id"],
+            start_day.isoformat(),
+            end_day.isoformat(),
+            event_type=params.get('type'),
+            limit=limit
+        ), "history")
+
+        return success_response({"events": events, "count": len(events)})
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'GET':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
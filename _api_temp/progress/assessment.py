@@ -1,12 +1,17 @@
 """Submit assessment endpoint for Vercel"""
-import asyncio
 from datetime import datetime
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import get_current_user
 from ..utils.models import AssessmentSubmission
-from ..utils.response import success_response, error_response
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.idempotency import idempotent
+from ..utils.analytics import analytics_recorder, record_assessments, record_activity
+from ..utils.activity import activity_buffer, ASSESSMENT_SUBMITTED
+from ..utils.write_queue import run_handler
 
+@idempotent("progress/assessment")
 async def handler(event, context):
     """Handle submit assessment"""
     try:
@@ -30,11 +35,11 @@ async def handler(event, context):
         except Exception as e:
             return error_response(400, "Invalid input", str(e))
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
         
         # Get current user
-        current_user = await get_current_user(db, token)
+        current_user = await get_current_user(storage, token)
         if not current_user:
             return error_response(401, "Invalid token")
         
@@ -49,19 +54,28 @@ async def handler(event, context):
         }
         
         # Update user progress with new assessment score
-        await db.user_progress.update_one(
-            {"user_id": user_id},
-            {
-                "$push": {"assessment_scores": assessment_score},
-                "$set": {"updated_at": datetime.utcnow()}
-            }
+        await storage.update_progress(
+            user_id,
+            {"updated_at": datetime.utcnow()},
+            push_assessments=[assessment_score]
         )
         
+        # Keep materialized analytics in step
+        db = storage.database("background")
+        analytics_recorder.schedule(record_assessments, db, [(assessment.assessment_id, assessment.score)])
+        analytics_recorder.schedule(record_activity, db, user_id)
+        activity_buffer.emit(db, user_id, ASSESSMENT_SUBMITTED, {
+            "assessment_id": assessment.assessment_id,
+            "score": assessment.score
+        })
+        
         return success_response({
             "message": "Assessment submitted successfully", 
             "score": assessment.score
         })
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -75,4 +89,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""Section recommendations endpoint for Vercel"""
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.recommendations import get_recommender
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+DEFAULT_RECOMMENDATIONS = 5
+MAX_RECOMMENDATIONS = 20
+
+async def handler(event, context):
+    """Handle get next-section recommendations"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Validate query parameters
+        params = event.get('queryStringParameters') or {}
+        try:
+            k = min(int(params.get('k', DEFAULT_RECOMMENDATIONS)), MAX_RECOMMENDATIONS)
+            if k < 1:
+                raise ValueError("k must be positive")
+        except ValueError as e:
+            return error_response(400, "Invalid input", str(e))
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        recommender = get_recommender()
+        if recommender is None:
+            return error_response(503, "Recommendations are not available yet")
+
+        # Only this learner's progress is read; everything else comes from the snapshot
+        progress = await storage.get_progress(current_user["_id"]) or {}
+
+        recommendations = recommender.recommend(
+            progress.get("completed_sections", []),
+            progress.get("assessment_scores", []),
+            k
+        )
+
+        return success_response({
+            "recommendations": recommendations,
+            "generated_at": recommender.built_at
+        })
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'GET':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
@@ -1,15 +1,18 @@
 """Update section progress endpoint for Vercel"""
-import asyncio
 from datetime import datetime
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import get_current_user
 from ..utils.models import ProgressUpdate
-from ..utils.response import success_response, error_response
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.analytics import analytics_recorder, snapshot_progress, record_progress_change, record_activity
+from ..utils.activity import activity_buffer, SECTION_TOGGLED
+from ..utils.write_queue import run_handler
 
-async def get_user_progress(db, user_id):
+async def get_user_progress(storage, user_id):
     """Get user progress (helper function)"""
-    return await db.user_progress.find_one({"user_id": user_id})
+    return await storage.get_progress(user_id)
 
 def calculate_total_progress(completed_sections, module_progress):
     """Calculate total progress percentage"""
@@ -25,6 +28,24 @@ def calculate_total_progress(completed_sections, module_progress):
     
     return min(100.0, module_weight + section_weight)
 
+def apply_progress_update(progress, progress_update, completed_at):
+    """Apply a ProgressUpdate to a progress document in place"""
+    # Update completed sections
+    completed_sections = progress["completed_sections"]
+    if progress_update.completed and progress_update.section_id not in completed_sections:
+        completed_sections.append(progress_update.section_id)
+    elif not progress_update.completed and progress_update.section_id in completed_sections:
+        completed_sections.remove(progress_update.section_id)
+    
+    # Update module progress if this completes a module
+    module_progress = progress["module_progress"]
+    if progress_update.module_id in module_progress:
+        module_progress[progress_update.module_id]["completed"] = progress_update.completed
+        if progress_update.completed:
+            module_progress[progress_update.module_id]["completed_at"] = completed_at
+        else:
+            module_progress[progress_update.module_id]["completed_at"] = None
+
 async def handler(event, context):
     """Handle update section progress"""
     try:
@@ -48,58 +69,56 @@ async def handler(event, context):
         except Exception as e:
             return error_response(400, "Invalid input", str(e))
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
         
         # Get current user
-        current_user = await get_current_user(db, token)
+        current_user = await get_current_user(storage, token)
         if not current_user:
             return error_response(401, "Invalid token")
         
         user_id = current_user["_id"]
-        progress = await get_user_progress(db, user_id)
+        progress = await get_user_progress(storage, user_id)
         
         if not progress:
             return error_response(404, "User progress not found")
         
-        # Update completed sections
+        # Update completed sections and module progress
+        before = snapshot_progress(progress)
+        apply_progress_update(progress, progress_update, datetime.utcnow())
         completed_sections = progress["completed_sections"]
-        if progress_update.completed and progress_update.section_id not in completed_sections:
-            completed_sections.append(progress_update.section_id)
-        elif not progress_update.completed and progress_update.section_id in completed_sections:
-            completed_sections.remove(progress_update.section_id)
-        
-        # Update module progress if this completes a module
         module_progress = progress["module_progress"]
-        if progress_update.module_id in module_progress:
-            module_progress[progress_update.module_id]["completed"] = progress_update.completed
-            if progress_update.completed:
-                module_progress[progress_update.module_id]["completed_at"] = datetime.utcnow()
-            else:
-                module_progress[progress_update.module_id]["completed_at"] = None
         
         # Calculate new total progress
         total_progress = calculate_total_progress(completed_sections, module_progress)
+        progress["total_progress"] = total_progress
         
-        # Update database
-        await db.user_progress.update_one(
-            {"user_id": user_id},
-            {
-                "$set": {
-                    "completed_sections": completed_sections,
-                    "module_progress": module_progress,
-                    "total_progress": total_progress,
-                    "last_accessed_module": progress_update.module_id,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
+        # Update storage
+        await storage.update_progress(user_id, {
+            "completed_sections": completed_sections,
+            "module_progress": module_progress,
+            "total_progress": total_progress,
+            "last_accessed_module": progress_update.module_id,
+            "updated_at": datetime.utcnow()
+        })
+        
+        # Keep materialized analytics in step
+        db = storage.database("background")
+        analytics_recorder.schedule(record_progress_change, db, before, progress)
+        analytics_recorder.schedule(record_activity, db, user_id)
+        activity_buffer.emit(db, user_id, SECTION_TOGGLED, {
+            "section_id": progress_update.section_id,
+            "module_id": progress_update.module_id,
+            "completed": progress_update.completed
+        })
         
         return success_response({
             "message": "Progress updated successfully", 
             "total_progress": total_progress
         })
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -113,4 +132,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Bulk offline progress sync endpoint for Vercel"""
+from datetime import datetime, timezone
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.models import ProgressSync
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.analytics import analytics_recorder, snapshot_progress, record_progress_change, record_assessments, record_activity
+from ..utils.activity import activity_buffer, SECTION_TOGGLED, ASSESSMENT_SUBMITTED
+from ..utils.write_queue import run_handler
+from .index import get_user_progress, progress_to_response
+from .section import apply_progress_update, calculate_total_progress
+
+def to_utc_naive(timestamp):
+    """Normalize a client timestamp to naive UTC like datetime.utcnow()"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def to_stored_time(timestamp):
+    """Client timestamp as it reads back from storage (BSON keeps milliseconds)"""
+    timestamp = to_utc_naive(timestamp)
+    return timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+
+def ordered_by_client_time(items):
+    """Sort items by client timestamp, keeping submission order for ties"""
+    indexed = sorted(enumerate(items), key=lambda pair: (to_utc_naive(pair[1].client_timestamp), pair[0]))
+    return [item for _, item in indexed]
+
+def merge_sync(progress, sync):
+    """Replay queued updates onto a progress document; returns (fields, new assessment scores)
+
+    An assessment already stored with the same id and client timestamp is
+    skipped, so a client retrying a sync whose response it never saw does
+    not record its assessments twice.
+    """
+    updates = ordered_by_client_time(sync.updates)
+    for progress_update in updates:
+        apply_progress_update(progress, progress_update, to_utc_naive(progress_update.client_timestamp))
+
+    stored = progress.setdefault("assessment_scores", [])
+    seen = {(score["assessment_id"], score["completed_at"]) for score in stored}
+    assessment_scores = []
+    for assessment in ordered_by_client_time(sync.assessments):
+        key = (assessment.assessment_id, to_stored_time(assessment.client_timestamp))
+        if key in seen:
+            continue
+        seen.add(key)
+        assessment_scores.append({
+            "assessment_id": assessment.assessment_id,
+            "score": assessment.score,
+            "answers": assessment.answers,
+            "completed_at": key[1]
+        })
+    stored.extend(assessment_scores)
+
+    progress["total_progress"] = calculate_total_progress(
+        progress["completed_sections"], progress["module_progress"]
+    )
+    if updates:
+        progress["last_accessed_module"] = updates[-1].module_id
+
+    fields = {
+        "completed_sections": progress["completed_sections"],
+        "module_progress": progress["module_progress"],
+        "total_progress": progress["total_progress"],
+        "last_accessed_module": progress.get("last_accessed_module"),
+        "updated_at": datetime.utcnow()
+    }
+
+    return fields, assessment_scores
+
+async def handler(event, context):
+    """Handle bulk progress sync"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Parse request body
+        import json
+        body = json.loads(event.get('body', '{}'))
+
+        # Validate input
+        try:
+            sync = ProgressSync(**body)
+        except Exception as e:
+            return error_response(400, "Invalid input", str(e))
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        user_id = current_user["_id"]
+        progress = await get_user_progress(storage, user_id)
+
+        # Merge all queued changes and write them in a single update
+        if sync.updates or sync.assessments:
+            before = snapshot_progress(progress)
+            fields, assessment_scores = merge_sync(progress, sync)
+            await storage.update_progress(user_id, fields, push_assessments=assessment_scores)
+
+            # Keep materialized analytics in step
+            db = storage.database("background")
+            analytics_recorder.schedule(record_progress_change, db, before, progress)
+            analytics_recorder.schedule(record_assessments, db, [(a["assessment_id"], a["score"]) for a in assessment_scores])
+            analytics_recorder.schedule(record_activity, db, user_id)
+            for progress_update in sync.updates:
+                activity_buffer.emit(db, user_id, SECTION_TOGGLED, {
+                    "section_id": progress_update.section_id,
+                    "module_id": progress_update.module_id,
+                    "completed": progress_update.completed
+                }, at=to_utc_naive(progress_update.client_timestamp))
+            for assessment in assessment_scores:
+                activity_buffer.emit(db, user_id, ASSESSMENT_SUBMITTED, {
+                    "assessment_id": assessment["assessment_id"],
+                    "score": assessment["score"]
+                }, at=assessment["completed_at"])
+
+        return success_response(progress_to_response(progress))
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'POST':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
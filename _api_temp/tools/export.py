@@ -0,0 +1,167 @@
+"""Streaming export endpoint for RICE calculations and user stories"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from ..utils.database import max_time_ms
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.resilience import DatabaseUnavailableError, resilient_call
+from ..utils.response import streaming_response, success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_streaming_handler
+
+# Documents fetched per cursor round trip and rows written per streamed chunk
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_ROWS = 500
+
+# Vercel rejects response bodies over 4.5 MB, and serverless functions
+# buffer the whole body, so larger exports answer 413 there; with
+# DEPLOYMENT_MODE=server exports are streamed with no limit
+MAX_BUFFERED_EXPORT_BYTES = 4_500_000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+RICE_EXPORT_FIELDS = ["id", "feature_name", "reach", "impact", "confidence", "effort", "score", "created_at"]
+STORY_EXPORT_FIELDS = ["id", "project_name", "story", "category", "priority", "formatted_story", "created_at"]
+
+def rice_export_cursor(db, user_id):
+    """Cursor over a user's RICE calculations, newest first"""
+    return db.rice_calculations.find(
+        {"user_id": user_id},
+        {"user_id": 0}
+    ).sort("created_at", -1).batch_size(EXPORT_BATCH_SIZE).max_time_ms(max_time_ms("export"))
+
+def story_export_cursor(db, user_id):
+    """Cursor over a user's stories, one row per story"""
+    return db.user_stories.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"created_at": -1}},
+        {"$unwind": "$stories"},
+        {"$project": {
+            "_id": 1,
+            "project_name": 1,
+            "story": "$stories.story",
+            "category": "$stories.category",
+            "priority": "$stories.priority",
+            "formatted_story": "$stories.formatted_story",
+            "created_at": 1
+        }}
+    ], batchSize=EXPORT_BATCH_SIZE, maxTimeMS=max_time_ms("export"))
+
+EXPORT_TYPES = {
+    "rice": (rice_export_cursor, RICE_EXPORT_FIELDS),
+    "user-stories": (story_export_cursor, STORY_EXPORT_FIELDS)
+}
+
+def export_row(document, fields):
+    """Flatten an exported document into a row dict"""
+    row = {field: document.get(field) for field in fields}
+    row["id"] = str(document["_id"])
+    if isinstance(row.get("created_at"), datetime):
+        row["created_at"] = row["created_at"].isoformat()
+    return row
+
+async def stream_export(cursor, fields, export_format):
+    """Yield CSV or NDJSON chunks of EXPORT_CHUNK_ROWS rows while reading the cursor
+
+    The first chunk (with the CSV header) is yielded even for an empty
+    export, so callers can read it before committing to a 200. Each read
+    runs under the export profile's deadline and the circuit breaker and
+    raises DatabaseUnavailableError when the database is unreachable.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+
+    first = True
+    while True:
+        # A cursor cannot be rewound, so reads are not retried
+        documents = await resilient_call(lambda: cursor.to_list(EXPORT_CHUNK_ROWS), "export")
+        for document in documents:
+            row = export_row(document, fields)
+            if writer:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row, default=str) + "\n")
+
+        if documents or first:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        first = False
+        if not documents:
+            return
+
+async def prepend(first, chunks):
+    """Async iterator yielding first and then the rest of chunks"""
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+async def handler(event, context):
+    """Handle export of RICE calculations or user stories"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Validate query parameters
+        params = event.get('queryStringParameters') or {}
+        export_type = params.get('type', 'rice')
+        export_format = params.get('format', 'csv')
+        if export_type not in EXPORT_TYPES:
+            return error_response(400, "Invalid input", f"type must be one of {', '.join(EXPORT_TYPES)}")
+        if export_format not in EXPORT_FORMATS:
+            return error_response(400, "Invalid input", f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        # Only the MongoDB backend can serve this endpoint
+        db = storage.database("export")
+        if db is None:
+            return error_response(501, "Not supported by the configured storage backend")
+
+        cursor_factory, fields = EXPORT_TYPES[export_type]
+        cursor = cursor_factory(db, current_user["_id"])
+        filename = f"{export_type}_{datetime.utcnow().strftime('%Y-%m-%d')}.{export_format}"
+
+        # Read the first chunk here so an unreachable database is a 503, not a broken stream
+        chunks = stream_export(cursor, fields, export_format)
+        first = await chunks.__anext__()
+
+        return streaming_response(prepend(first, chunks), EXPORT_FORMATS[export_format], filename)
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'GET':
+        return error_response(405, "Method not allowed")
+
+    # Streamed in server mode; buffered up to MAX_BUFFERED_EXPORT_BYTES in serverless mode
+    return run_streaming_handler(handler(event, context), MAX_BUFFERED_EXPORT_BYTES)
@@ -1,12 +1,15 @@
 """RICE calculation endpoint for Vercel"""
-import asyncio
 from datetime import datetime
 from bson import ObjectId
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import get_current_user
 from ..utils.models import RiceCalculationCreate
-from ..utils.response import success_response, error_response
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.idempotency import idempotent
+from ..utils.activity import activity_buffer, RICE_COMPUTED
+from ..utils.write_queue import run_handler
 
 def calculate_rice_score(reach, impact, confidence, effort):
     """Calculate RICE score"""
@@ -14,6 +17,7 @@ def calculate_rice_score(reach, impact, confidence, effort):
         return 0
     return (reach * impact * (confidence / 100)) / effort
 
+@idempotent("tools/rice-calculation")
 async def handler(event, context):
     """Handle RICE calculation"""
     try:
@@ -37,11 +41,11 @@ async def handler(event, context):
         except Exception as e:
             return error_response(400, "Invalid input", str(e))
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
         
         # Get current user
-        current_user = await get_current_user(db, token)
+        current_user = await get_current_user(storage, token)
         if not current_user:
             return error_response(401, "Invalid token")
         
@@ -68,9 +72,13 @@ async def handler(event, context):
             "created_at": datetime.utcnow()
         }
         
-        # Save to database
-        result = await db.rice_calculations.insert_one(calculation_dict)
-        calculation_dict["_id"] = result.inserted_id
+        # Save to storage
+        calculation_dict["_id"] = await storage.insert_rice_calculation(calculation_dict)
+        activity_buffer.emit(storage.database("background"), user_id, RICE_COMPUTED, {
+            "calculation_id": str(calculation_dict["_id"]),
+            "feature_name": calculation_data.feature_name,
+            "score": score
+        })
         
         response_data = {
             "id": str(calculation_dict["_id"]),
@@ -85,6 +93,8 @@ async def handler(event, context):
         
         return success_response(response_data)
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -98,4 +108,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
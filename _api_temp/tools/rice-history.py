@@ -1,9 +1,10 @@
 """RICE calculation history endpoint for Vercel"""
-import asyncio
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import get_current_user
-from ..utils.response import success_response, error_response
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
 
 async def handler(event, context):
     """Handle get RICE calculation history"""
@@ -18,20 +19,18 @@ async def handler(event, context):
         # Extract token
         token = auth_header.split(' ')[1]
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
         
         # Get current user
-        current_user = await get_current_user(db, token)
+        current_user = await get_current_user(storage, token)
         if not current_user:
             return error_response(401, "Invalid token")
         
         user_id = current_user["_id"]
         
         # Get calculations sorted by creation date (newest first)
-        calculations = await db.rice_calculations.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(50).to_list(50)
+        calculations = await storage.list_rice_calculations(user_id, 50)
         
         # Convert to response format
         response_list = []
@@ -49,6 +48,8 @@ async def handler(event, context):
         
         return success_response(response_list)
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -62,4 +63,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
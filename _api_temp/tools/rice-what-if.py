@@ -0,0 +1,199 @@
+"""RICE sensitivity and what-if analysis endpoint for Vercel"""
+import asyncio
+
+import numpy as np
+
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.models import RiceWhatIfRequest
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+RICE_PARAMETERS = ("reach", "impact", "confidence", "effort")
+
+# Largest features x scenarios evaluated per request; tests/bench_rice_what_if.py
+# measures about 2 s and 280 MB of extra RSS for Monte Carlo at this size
+MAX_WHAT_IF_CELLS = 10_000_000
+
+def parameter_bounds(features, name):
+    """(low, mode, high, triangular) arrays for one parameter across features"""
+    lows, modes, highs, triangular = [], [], [], []
+    for feature in features:
+        value = getattr(feature, name)
+        if isinstance(value, (int, float)):
+            lows.append(value)
+            highs.append(value)
+            modes.append(value)
+            triangular.append(False)
+        else:
+            lows.append(value.min)
+            highs.append(value.max)
+            modes.append(value.mode if value.mode is not None else (value.min + value.max) / 2)
+            triangular.append(value.distribution == "triangular")
+    return (
+        np.array(lows, dtype=np.float32),
+        np.array(modes, dtype=np.float32),
+        np.array(highs, dtype=np.float32),
+        np.array(triangular, dtype=bool)
+    )
+
+def sample_parameter(rng, bounds, samples):
+    """Draw a (features, samples) matrix from uniform or triangular ranges"""
+    low, mode, high, triangular = bounds
+    width = high - low
+    u = rng.random((len(low), samples), dtype=np.float32)
+    values = low[:, None] + width[:, None] * u
+
+    if triangular.any():
+        # Inverse CDF of the triangular distribution
+        lo, md, hi, w = low[triangular, None], mode[triangular, None], high[triangular, None], width[triangular, None]
+        ut = u[triangular]
+        split = np.divide(md - lo, w, out=np.full_like(w, 0.5), where=w > 0)
+        left = lo + np.sqrt(ut * w * (md - lo))
+        right = hi - np.sqrt((1 - ut) * w * (hi - md))
+        values[triangular] = np.where(ut < split, left, right)
+
+    return values
+
+def grid_parameters(all_bounds, steps):
+    """Evaluate every combination of `steps` points per parameter as shared scenarios"""
+    axes = np.linspace(0, 1, steps, dtype=np.float32)
+    mesh = np.meshgrid(*([axes] * len(all_bounds)), indexing="ij")
+    return [
+        bounds[0][:, None] + (bounds[2] - bounds[0])[:, None] * position.ravel()[None, :]
+        for bounds, position in zip(all_bounds, mesh)
+    ]
+
+def scenario_count(request: RiceWhatIfRequest) -> int:
+    """Scenarios evaluated for every feature"""
+    if request.method == "grid":
+        return request.grid_steps ** len(RICE_PARAMETERS)
+    return request.samples
+
+def rice_scores(reach, impact, confidence, effort):
+    """Vectorized calculate_rice_score (effort is validated > 0)"""
+    return reach * impact * (confidence / 100) / effort
+
+def analyze(request: RiceWhatIfRequest):
+    """Score intervals and rank stability for every feature"""
+    all_bounds = [parameter_bounds(request.features, name) for name in RICE_PARAMETERS]
+
+    if request.method == "grid":
+        values = grid_parameters(all_bounds, request.grid_steps)
+    else:
+        rng = np.random.default_rng(request.seed)
+        values = [sample_parameter(rng, bounds, request.samples) for bounds in all_bounds]
+    scores = rice_scores(*values)
+    del values
+
+    point_scores = rice_scores(*[bounds[1] for bounds in all_bounds])
+    point_ranks = np.empty(len(point_scores), dtype=np.int64)
+    point_ranks[np.argsort(-point_scores, kind="stable")] = np.arange(len(point_scores))
+
+    # Rank of each feature within every sample (0 = highest score)
+    ranks = np.empty(scores.shape, dtype=np.int32)
+    order = np.argsort(-scores, axis=0, kind="stable")
+    np.put_along_axis(ranks, order, np.arange(scores.shape[0], dtype=np.int32)[:, None], axis=0)
+    del order
+
+    top_k = min(request.top_k, len(request.features))
+    p5, p50, p95 = np.percentile(scores, [5, 50, 95], axis=1)
+    rank_p5, rank_p95 = np.percentile(ranks, [5, 95], axis=1)
+    results = {
+        "mean": scores.mean(axis=1),
+        "min": scores.min(axis=1),
+        "max": scores.max(axis=1),
+        "rank_stability": (ranks == point_ranks[:, None]).mean(axis=1),
+        "top_k_probability": (ranks < top_k).mean(axis=1),
+        "expected_rank": ranks.mean(axis=1)
+    }
+
+    features = []
+    for i, feature in enumerate(request.features):
+        features.append({
+            "feature_name": feature.feature_name,
+            "point_score": float(point_scores[i]),
+            "point_rank": int(point_ranks[i]) + 1,
+            "score": {
+                "mean": float(results["mean"][i]),
+                "min": float(results["min"][i]),
+                "max": float(results["max"][i]),
+                "p5": float(p5[i]),
+                "p50": float(p50[i]),
+                "p95": float(p95[i])
+            },
+            "rank": {
+                "expected": float(results["expected_rank"][i]) + 1,
+                "p5": float(rank_p5[i]) + 1,
+                "p95": float(rank_p95[i]) + 1
+            },
+            "rank_stability": float(results["rank_stability"][i]),
+            "top_k_probability": float(results["top_k_probability"][i])
+        })
+
+    return {
+        "method": request.method,
+        "scenarios": int(scores.shape[1]),
+        "top_k": top_k,
+        "features": features
+    }
+
+async def handler(event, context):
+    """Handle RICE what-if analysis"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Parse request body
+        import json
+        body = json.loads(event.get('body', '{}'))
+
+        # Validate input
+        try:
+            request = RiceWhatIfRequest(**body)
+        except Exception as e:
+            return error_response(400, "Invalid input", str(e))
+
+        # Bound the memory and CPU of a single analysis
+        cells = len(request.features) * scenario_count(request)
+        if cells > MAX_WHAT_IF_CELLS:
+            return error_response(
+                400, "Invalid input",
+                f"features x scenarios is {cells}; at most {MAX_WHAT_IF_CELLS} are evaluated per request"
+            )
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        # CPU-bound NumPy work runs off the event loop
+        return success_response(await asyncio.to_thread(analyze, request))
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'POST':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
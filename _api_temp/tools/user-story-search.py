@@ -0,0 +1,141 @@
+"""User story search endpoint for Vercel"""
+
+from ..utils.database import max_time_ms
+from ..utils.storage import get_storage
+from ..utils.auth import get_current_user
+from ..utils.indexes import ensure_indexes
+from ..utils.resilience import DatabaseUnavailableError, resilient_read
+from ..utils.search import search_terms
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.write_queue import run_handler
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+
+def build_search_pipeline(user_id, params, limit, skip):
+    """Build an aggregation returning only the stories that match the filters"""
+    project_name = params.get('project_name')
+    category = params.get('category')
+    priority = params.get('priority')
+    terms = search_terms(params.get('q') or '')
+
+    # Document-level match, served by the compound and search term indexes
+    match = {"user_id": user_id}
+    if terms:
+        match["stories.search_terms"] = {"$in": terms}
+    if project_name:
+        match["project_name"] = project_name
+    if category:
+        match["stories.category"] = category
+    if priority:
+        match["stories.priority"] = priority
+
+    # Story-level conditions, so non-matching stories in a document are dropped
+    conditions = []
+    if category:
+        conditions.append({"$eq": ["$$story.category", category]})
+    if priority:
+        conditions.append({"$eq": ["$$story.priority", priority]})
+    if terms:
+        # The same terms as the document-level match, so both agree on every story
+        conditions.append({"$gt": [
+            {"$size": {"$setIntersection": [{"$ifNull": ["$$story.search_terms", []]}, terms]}}, 0
+        ]})
+
+    stories = "$stories"
+    if conditions:
+        stories = {"$filter": {"input": "$stories", "as": "story", "cond": {"$and": conditions}}}
+
+    return [
+        {"$match": match},
+        {"$sort": {"created_at": -1}},
+        {"$project": {"project_name": 1, "created_at": 1, "stories": stories}},
+        {"$unwind": "$stories"},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 1,
+            "project_name": 1,
+            "story": "$stories.story",
+            "category": "$stories.category",
+            "priority": "$stories.priority",
+            "formatted_story": "$stories.formatted_story",
+            "created_at": 1
+        }}
+    ]
+
+async def handler(event, context):
+    """Handle user story search"""
+    try:
+        # Get authorization header
+        headers = event.get('headers', {})
+        auth_header = headers.get('authorization') or headers.get('Authorization')
+
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return error_response(401, "Missing or invalid authorization header")
+
+        # Extract token
+        token = auth_header.split(' ')[1]
+
+        # Validate paging parameters
+        params = event.get('queryStringParameters') or {}
+        try:
+            limit = min(int(params.get('limit', DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+            skip = int(params.get('skip', 0))
+            if limit < 1 or skip < 0:
+                raise ValueError("limit must be positive and skip non-negative")
+        except ValueError as e:
+            return error_response(400, "Invalid input", str(e))
+
+        # Get storage backend
+        storage = await get_storage()
+
+        # Get current user
+        current_user = await get_current_user(storage, token)
+        if not current_user:
+            return error_response(401, "Invalid token")
+
+        # Only the MongoDB backend can serve this endpoint
+        db = storage.database("history")
+        if db is None:
+            return error_response(501, "Not supported by the configured storage backend")
+
+        pipeline = build_search_pipeline(current_user["_id"], params, limit, skip)
+
+        async def search():
+            await ensure_indexes(db, "user_stories")
+            return await db.user_stories.aggregate(pipeline, maxTimeMS=max_time_ms("history")).to_list(limit)
+
+        results = await resilient_read(search, "history")
+
+        # Convert to response format
+        stories = []
+        for result in results:
+            stories.append({
+                "id": str(result["_id"]),
+                "project_name": result.get("project_name"),
+                "story": result.get("story"),
+                "category": result.get("category"),
+                "priority": result.get("priority"),
+                "formatted_story": result.get("formatted_story"),
+                "created_at": result.get("created_at")
+            })
+
+        return success_response({"stories": stories, "count": len(stories)})
+
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+
+def main(event, context):
+    """Main entry point for Vercel"""
+    # Handle OPTIONS for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return success_response({})
+
+    if event.get('httpMethod') != 'GET':
+        return error_response(405, "Method not allowed")
+
+    # Run async handler
+    return run_handler(handler(event, context))
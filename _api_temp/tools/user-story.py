@@ -1,13 +1,17 @@
 """User story endpoint for Vercel"""
-import asyncio
 from datetime import datetime
 from bson import ObjectId
 
-from ..utils.database import get_database
+from ..utils.storage import get_storage
 from ..utils.auth import get_current_user
 from ..utils.models import UserStoryCreate
-from ..utils.response import success_response, error_response
+from ..utils.resilience import DatabaseUnavailableError
+from ..utils.response import success_response, error_response, service_unavailable_response
+from ..utils.idempotency import idempotent
+from ..utils.search import search_terms
+from ..utils.write_queue import run_handler
 
+@idempotent("tools/user-story")
 async def handler(event, context):
     """Handle user story save or get"""
     try:
@@ -21,11 +25,11 @@ async def handler(event, context):
         # Extract token
         token = auth_header.split(' ')[1]
         
-        # Get database
-        db = await get_database()
+        # Get storage backend
+        storage = await get_storage()
         
         # Get current user
-        current_user = await get_current_user(db, token)
+        current_user = await get_current_user(storage, token)
         if not current_user:
             return error_response(401, "Invalid token")
         
@@ -34,14 +38,14 @@ async def handler(event, context):
         # Handle GET request (get user stories)
         if event.get('httpMethod') == 'GET':
             # Get user stories sorted by creation date (newest first)
-            stories = await db.user_stories.find(
-                {"user_id": user_id}
-            ).sort("created_at", -1).limit(20).to_list(20)
+            stories = await storage.list_user_stories(user_id, 20)
             
             # Convert ObjectId to string for JSON serialization
             for story in stories:
                 story["_id"] = str(story["_id"])
                 story["user_id"] = str(story["user_id"])
+                for item in story["stories"]:
+                    item.pop("search_terms", None)
             
             return success_response({"user_stories": stories})
         
@@ -65,7 +69,8 @@ async def handler(event, context):
                     "story": story.story,
                     "category": story.category,
                     "priority": story.priority,
-                    "formatted_story": formatted_story
+                    "formatted_story": formatted_story,
+                    "search_terms": search_terms(story.story)
                 })
             
             # Create user story record
@@ -77,18 +82,20 @@ async def handler(event, context):
                 "created_at": datetime.utcnow()
             }
             
-            # Save to database
-            result = await db.user_stories.insert_one(story_dict)
+            # Save to storage
+            story_id = await storage.insert_user_stories(story_dict)
             
             return success_response({
                 "message": "User stories saved successfully",
-                "id": str(result.inserted_id),
+                "id": str(story_id),
                 "story_count": len(formatted_stories)
             })
         
         else:
             return error_response(405, "Method not allowed")
         
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
     except Exception as e:
         return error_response(500, "Internal server error", str(e))
 
@@ -102,4 +109,4 @@ def main(event, context):
         return error_response(405, "Method not allowed")
     
     # Run async handler
-    return asyncio.run(handler(event, context))
\ No newline at end of file
+    return run_handler(handler(event, context))
\ No newline at end of file
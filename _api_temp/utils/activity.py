@@ -0,0 +1,165 @@
+"""Learning activity events buffered in process and stored in daily buckets"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .database import max_time_ms
+from .indexes import ensure_indexes
+from .resilience import resilient_write
+from .write_queue import register_drainable
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FLUSH_INTERVAL_SECONDS = 1.0
+ACTIVITY_FLUSH_SIZE = 500
+MAX_BUFFERED_EVENTS = 50000
+
+# Soft cap on events per bucket document; a full bucket starts a new one for the same day
+EVENTS_PER_BUCKET = 1000
+
+# Event types
+SECTION_TOGGLED = "section_toggled"
+ASSESSMENT_SUBMITTED = "assessment_submitted"
+RICE_COMPUTED = "rice_computed"
+
+class ActivityBuffer:
+    """Append-only event buffer flushed as per-user, per-day bucket upserts"""
+
+    def __init__(
+        self,
+        flush_interval: float = ACTIVITY_FLUSH_INTERVAL_SECONDS,
+        flush_size: int = ACTIVITY_FLUSH_SIZE,
+        max_buffered: int = MAX_BUFFERED_EVENTS
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_buffered = max_buffered
+        self._db = None
+        self._events: List[Tuple[Any, Dict[str, Any]]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes = set()
+        self._metrics = {
+            "emitted": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "last_flush_ms": 0.0
+        }
+
+    def emit(self, db, user_id, event_type: str, data: Optional[Dict[str, Any]] = None,
+             at: Optional[datetime] = None) -> bool:
+        """Buffer an event; it is written on the next flush (skipped without MongoDB)"""
+        if db is None:
+            return False
+        if len(self._events) >= self.max_buffered:
+            self._metrics["dropped"] += 1
+            return False
+
+        self._db = db
+        self._metrics["emitted"] += 1
+        self._events.append((user_id, {
+            "type": event_type,
+            "at": at or datetime.utcnow(),
+            "data": data or {}
+        }))
+
+        if len(self._events) >= self.flush_size:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None or self._timer.done() or self._timer.get_loop() is not asyncio.get_running_loop():
+            self._timer = asyncio.create_task(self._flush_later())
+        return True
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Append buffered events to their buckets with one bulk_write"""
+        if not self._events:
+            return 0
+
+        events, self._events = self._events, []
+        buckets: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+        for user_id, event in events:
+            buckets.setdefault((user_id, event["at"].strftime("%Y-%m-%d")), []).append(event)
+
+        operations = []
+        for (user_id, day), bucket_events in buckets.items():
+            for start in range(0, len(bucket_events), EVENTS_PER_BUCKET):
+                chunk = bucket_events[start:start + EVENTS_PER_BUCKET]
+                operations.append(UpdateOne(
+                    {"user_id": user_id, "day": day, "count": {"$lt": EVENTS_PER_BUCKET}},
+                    {
+                        "$push": {"events": {"$each": chunk}},
+                        "$inc": {"count": len(chunk)},
+                        "$setOnInsert": {"created_at": datetime.utcnow()}
+                    },
+                    upsert=True
+                ))
+
+        started = time.perf_counter()
+        try:
+            async def write():
+                await ensure_indexes(self._db, "activity_events")
+                await self._db.activity_events.bulk_write(operations, ordered=False)
+
+            await resilient_write(write, "background")
+            self._metrics["flushed"] += len(events)
+        except Exception:
+            # Events are not retried; a lost flush is logged and counted for /api/admin/metrics
+            self._metrics["dropped"] += len(events)
+            self._metrics["failed_flushes"] += 1
+            logger.warning("Dropped %d activity events in %d buckets", len(events), len(operations), exc_info=True)
+        self._metrics["flushes"] += 1
+        self._metrics["last_flush_ms"] = (time.perf_counter() - started) * 1000
+        return len(events)
+
+    async def drain(self) -> None:
+        """Flush everything before shutdown or before the event loop closes"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self._metrics, "buffered": len(self._events)}
+
+# Global buffer shared by handlers in this process
+activity_buffer = ActivityBuffer()
+register_drainable(activity_buffer)
+
+async def get_activity_timeline(db, user_id, start_day: str, end_day: str,
+                                event_type: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """Events for a user between two YYYY-MM-DD days, newest first
+
+    Buckets are read newest day first, and reading stops at the first older
+    day once `limit` events are collected: an event's bucket day is the day
+    it happened, so older buckets cannot hold anything newer.
+    """
+    events = []
+    cursor = db.activity_events.find(
+        {"user_id": user_id, "day": {"$gte": start_day, "$lte": end_day}},
+        {"day": 1, "events": 1}
+    ).sort("day", -1).max_time_ms(max_time_ms("history"))
+
+    day = None
+    async for bucket in cursor:
+        if len(events) >= limit and bucket["day"] != day:
+            await cursor.close()
+            break
+        day = bucket["day"]
+        for event in bucket.get("events", []):
+            if event_type is None or event["type"] == event_type:
+                events.append(event)
+
+    events.sort(key=lambda event: event["at"], reverse=True)
+    return events[:limit]
@@ -0,0 +1,235 @@
+"""Materialized learner analytics maintained with $inc upserts
+
+Recording functions are no-ops when db is None (non-MongoDB storage).
+Handlers run them through analytics_recorder so they stay off the response
+path and a failure never fails the write they describe.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from .indexes import ensure_indexes
+from .resilience import resilient_write
+from .write_queue import register_drainable
+
+logger = logging.getLogger(__name__)
+
+# learner_stats document IDs
+MODULE_STATS_ID = "modules"
+PROGRESS_HISTOGRAM_ID = "progress_histogram"
+ASSESSMENT_STATS_ID = "assessments"
+DAILY_ACTIVE_ID = "daily_active"
+LEARNER_TOTALS_ID = "learners"
+
+PROGRESS_BUCKET_SIZE = 10
+PROGRESS_BUCKET_COUNT = 10
+
+def _field_key(value: str) -> str:
+    """Make a user-supplied ID safe to use as a field name"""
+    return str(value).replace(".", "_").replace("$", "_")
+
+def progress_bucket(total_progress: float) -> str:
+    """Histogram bucket for a total_progress percentage (0-9)"""
+    return str(min(int(total_progress // PROGRESS_BUCKET_SIZE), PROGRESS_BUCKET_COUNT - 1))
+
+def snapshot_progress(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Capture the fields analytics depend on before a progress update"""
+    return {
+        "completed_modules": {
+            module_id for module_id, module in progress.get("module_progress", {}).items()
+            if module.get("completed")
+        },
+        "total_progress": progress.get("total_progress", 0.0)
+    }
+
+async def record_progress_change(db, before: Dict[str, Any], progress: Dict[str, Any]) -> None:
+    """Apply module completion and histogram deltas for one progress update"""
+    if db is None:
+        return
+    after = snapshot_progress(progress)
+    operations = []
+
+    completed: Set[str] = after["completed_modules"] - before["completed_modules"]
+    uncompleted: Set[str] = before["completed_modules"] - after["completed_modules"]
+    module_inc = {f"completions.{_field_key(m)}": 1 for m in completed}
+    module_inc.update({f"completions.{_field_key(m)}": -1 for m in uncompleted})
+    if module_inc:
+        operations.append(UpdateOne({"_id": MODULE_STATS_ID}, {"$inc": module_inc}, upsert=True))
+
+    old_bucket = progress_bucket(before["total_progress"])
+    new_bucket = progress_bucket(after["total_progress"])
+    if old_bucket != new_bucket:
+        operations.append(UpdateOne(
+            {"_id": PROGRESS_HISTOGRAM_ID},
+            {"$inc": {f"buckets.{old_bucket}": -1, f"buckets.{new_bucket}": 1}},
+            upsert=True
+        ))
+
+    if operations:
+        await db.learner_stats.bulk_write(operations, ordered=False)
+
+async def record_assessments(db, scores: Iterable[Tuple[str, float]]) -> None:
+    """Add submitted (assessment_id, score) pairs to the per-assessment running totals"""
+    if db is None:
+        return
+    increments: Dict[str, float] = {}
+    for assessment_id, score in scores:
+        key = _field_key(assessment_id)
+        increments[f"scores.{key}.sum"] = increments.get(f"scores.{key}.sum", 0) + score
+        increments[f"scores.{key}.count"] = increments.get(f"scores.{key}.count", 0) + 1
+
+    if increments:
+        await db.learner_stats.update_one({"_id": ASSESSMENT_STATS_ID}, {"$inc": increments}, upsert=True)
+
+async def record_new_learner(db, count: int = 1) -> None:
+    """Count newly registered learners in the 0% histogram bucket"""
+    if db is None or count < 1:
+        return
+    await db.learner_stats.bulk_write([
+        UpdateOne({"_id": LEARNER_TOTALS_ID}, {"$inc": {"count": count}}, upsert=True),
+        UpdateOne({"_id": PROGRESS_HISTOGRAM_ID}, {"$inc": {f"buckets.{progress_bucket(0.0)}": count}}, upsert=True)
+    ], ordered=False)
+
+async def record_activity(db, user_id, now: Optional[datetime] = None) -> None:
+    """Count the user as active today, once per day"""
+    if db is None:
+        return
+    now = now or datetime.utcnow()
+    day = now.strftime("%Y-%m-%d")
+    await ensure_indexes(db, "learner_activity")
+
+    result = await db.learner_activity.update_one(
+        {"_id": f"{user_id}:{day}"},
+        {"$setOnInsert": {"expires_at": now + timedelta(days=2)}},
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        await db.learner_stats.update_one(
+            {"_id": DAILY_ACTIVE_ID},
+            {"$inc": {f"days.{day}": 1}},
+            upsert=True
+        )
+
+class AnalyticsRecorder:
+    """Run recording functions in the background; failures are logged, not raised
+
+    Aggregates can drift when an update is lost; POST /api/admin/analytics
+    rebuilds them from user_progress.
+    """
+
+    def __init__(self):
+        self._tasks = set()
+        self._metrics = {"recorded": 0, "failed": 0}
+
+    async def record(self, function: Callable[..., Awaitable[None]], db, *args) -> None:
+        """Run one recording function under the background profile's deadline"""
+        if db is None:
+            return
+        try:
+            await resilient_write(lambda: function(db, *args), "background")
+            self._metrics["recorded"] += 1
+        except Exception:
+            self._metrics["failed"] += 1
+            logger.warning("Analytics update %s failed", function.__name__, exc_info=True)
+
+    def schedule(self, function: Callable[..., Awaitable[None]], db, *args) -> None:
+        """Record without making the request wait for it"""
+        if db is None:
+            return
+        task = asyncio.create_task(self.record(function, db, *args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        """Wait for scheduled updates before shutdown or before the event loop closes"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self._metrics, "pending": len(self._tasks)}
+
+# Global recorder shared by handlers in this process
+analytics_recorder = AnalyticsRecorder()
+register_drainable(analytics_recorder)
+
+async def get_learner_stats(db) -> Dict[str, Any]:
+    """Read all aggregates with a single query"""
+    documents = {
+        document["_id"]: document
+        async for document in db.learner_stats.find({"_id": {"$in": [
+            MODULE_STATS_ID, PROGRESS_HISTOGRAM_ID, ASSESSMENT_STATS_ID, DAILY_ACTIVE_ID, LEARNER_TOTALS_ID
+        ]}})
+    }
+
+    buckets = documents.get(PROGRESS_HISTOGRAM_ID, {}).get("buckets", {})
+    histogram = []
+    for bucket in range(PROGRESS_BUCKET_COUNT):
+        histogram.append({
+            "range": [bucket * PROGRESS_BUCKET_SIZE, (bucket + 1) * PROGRESS_BUCKET_SIZE],
+            "learners": buckets.get(str(bucket), 0)
+        })
+
+    assessment_averages = {}
+    for assessment_id, totals in documents.get(ASSESSMENT_STATS_ID, {}).get("scores", {}).items():
+        count = totals.get("count", 0)
+        assessment_averages[assessment_id] = {
+            "average_score": totals.get("sum", 0) / count if count else None,
+            "submissions": count
+        }
+
+    return {
+        "total_learners": documents.get(LEARNER_TOTALS_ID, {}).get("count", 0),
+        "module_completions": documents.get(MODULE_STATS_ID, {}).get("completions", {}),
+        "progress_histogram": histogram,
+        "assessment_averages": assessment_averages,
+        "daily_active_learners": documents.get(DAILY_ACTIVE_ID, {}).get("days", {})
+    }
+
+async def rebuild_learner_stats(db) -> Dict[str, Any]:
+    """Recompute aggregates from user_progress (daily actives cannot be rebuilt and are kept)"""
+    completions = {}
+    async for row in db.user_progress.aggregate([
+        {"$project": {"modules": {"$objectToArray": "$module_progress"}}},
+        {"$unwind": "$modules"},
+        {"$match": {"modules.v.completed": True}},
+        {"$group": {"_id": "$modules.k", "count": {"$sum": 1}}}
+    ]):
+        completions[_field_key(row["_id"])] = row["count"]
+
+    buckets = {}
+    async for row in db.user_progress.aggregate([
+        {"$group": {
+            "_id": {"$min": [
+                {"$floor": {"$divide": [{"$ifNull": ["$total_progress", 0]}, PROGRESS_BUCKET_SIZE]}},
+                PROGRESS_BUCKET_COUNT - 1
+            ]},
+            "count": {"$sum": 1}
+        }}
+    ]):
+        buckets[str(int(row["_id"]))] = row["count"]
+
+    scores = {}
+    async for row in db.user_progress.aggregate([
+        {"$unwind": "$assessment_scores"},
+        {"$group": {
+            "_id": "$assessment_scores.assessment_id",
+            "sum": {"$sum": "$assessment_scores.score"},
+            "count": {"$sum": 1}
+        }}
+    ]):
+        scores[_field_key(row["_id"])] = {"sum": row["sum"], "count": row["count"]}
+
+    # Only learner registrations are counted incrementally (record_new_learner)
+    learners = await db.users.count_documents({"role": "learner"})
+
+    await db.learner_stats.bulk_write([
+        UpdateOne({"_id": MODULE_STATS_ID}, {"$set": {"completions": completions}}, upsert=True),
+        UpdateOne({"_id": PROGRESS_HISTOGRAM_ID}, {"$set": {"buckets": buckets}}, upsert=True),
+        UpdateOne({"_id": ASSESSMENT_STATS_ID}, {"$set": {"scores": scores}}, upsert=True),
+        UpdateOne({"_id": LEARNER_TOTALS_ID}, {"$set": {"count": learners}}, upsert=True)
+    ], ordered=False)
+
+    return await get_learner_stats(db)
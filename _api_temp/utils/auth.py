@@ -1,11 +1,16 @@
 """Authentication utilities for serverless functions"""
+import asyncio
 import os
+import uuid
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from .revocation import revocation_list
+from .storage import StorageBackend
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-pm-guide-2024")
@@ -14,6 +19,9 @@ ACCESS_TOKEN_EXPIRE_HOURS = 24
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# (token, user) pair already authenticated for the current request context
+_request_user: ContextVar[Optional[Tuple[str, Dict[str, Any]]]] = ContextVar("_request_user", default=None)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -30,26 +38,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_user_by_email(db: AsyncIOMotorDatabase, email: str) -> Optional[Dict[str, Any]]:
+async def get_user_by_email(storage: StorageBackend, email: str) -> Optional[Dict[str, Any]]:
     """Get user by email"""
-    return await db.users.find_one({"email": email})
+    return await storage.get_user_by_email(email)
 
-async def get_user_by_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[Dict[str, Any]]:
+async def get_user_by_id(storage: StorageBackend, user_id: str) -> Optional[Dict[str, Any]]:
     """Get user by ID"""
     if not ObjectId.is_valid(user_id):
         return None
-    return await db.users.find_one({"_id": ObjectId(user_id)})
+    return await storage.get_user_by_id(ObjectId(user_id))
 
-async def authenticate_user(db: AsyncIOMotorDatabase, email: str, password: str) -> Optional[Dict[str, Any]]:
+async def authenticate_user(storage: StorageBackend, email: str, password: str) -> Optional[Dict[str, Any]]:
     """Authenticate user with email and password"""
-    user = await get_user_by_email(db, email)
+    user = await get_user_by_email(storage, email)
     if not user:
         return None
-    if not verify_password(password, user["password"]):
+    # bcrypt runs off the event loop so concurrent logins queue instead of blocking it
+    if not await asyncio.to_thread(verify_password, password, user["password"]):
         return None
     return user
 
@@ -60,17 +69,33 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
-        return {"user_id": user_id}
+        jti = payload.get("jti")
+        if jti and revocation_list.is_revoked(jti):
+            return None
+        return {"user_id": user_id, "jti": jti, "exp": payload.get("exp")}
     except JWTError:
         return None
 
-async def get_current_user(db: AsyncIOMotorDatabase, token: str) -> Optional[Dict[str, Any]]:
+def set_request_user(token: str, user: Dict[str, Any]):
+    """Mark token as authenticated for the current context (used by batch requests)"""
+    return _request_user.set((token, user))
+
+def reset_request_user(reset_token) -> None:
+    """Clear the pre-authenticated user set by set_request_user"""
+    _request_user.reset(reset_token)
+
+async def get_current_user(storage: StorageBackend, token: str) -> Optional[Dict[str, Any]]:
     """Get current user from token"""
+    cached = _request_user.get()
+    if cached and cached[0] == token:
+        return cached[1]
+    
+    await revocation_list.refresh(storage.db)
     token_data = decode_token(token)
     if not token_data:
         return None
     
-    user = await get_user_by_id(db, token_data["user_id"])
+    user = await get_user_by_id(storage, token_data["user_id"])
     return user
 
 def user_to_response(user: Dict[str, Any]) -> Dict[str, Any]:
@@ -1,37 +1,128 @@
 """Database utilities for Vercel serverless functions"""
+import logging
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import WriteConcern
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from typing import Any, Dict, Optional
 
 # Global connection pool
 _mongo_client: Optional[AsyncIOMotorClient] = None
 
+# Connection pool settings by DEPLOYMENT_MODE
+POOL_PROFILES: Dict[str, Dict[str, Any]] = {
+    # One short-lived connection per function instance
+    "serverless": {"maxPoolSize": 1, "minPoolSize": 0, "maxIdleTimeMS": 30000},
+    # Long-running process serving concurrent requests
+    "server": {"maxPoolSize": 50, "minPoolSize": 5, "maxIdleTimeMS": 300000}
+}
+
+# Per-operation profiles picked by name: read preference, write concern,
+# the server-side time limit applied to reads (writes are bounded by the
+# write concern's wtimeout), the client-side deadline for the whole call
+# including retries, and when to hedge a slow read (see resilience.py)
+DB_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Progress, registrations and anything read back immediately
+    "primary": {
+        "read_preference": Primary(),
+        "write_concern": WriteConcern(w="majority", wtimeout=2000),
+        "max_time_ms": 2000,
+        "deadline_ms": 2500
+    },
+    # User lookup on every authenticated request; fail fast
+    "auth": {
+        "read_preference": Primary(),
+        "write_concern": WriteConcern(w="majority", wtimeout=2000),
+        "max_time_ms": 1000,
+        "deadline_ms": 1500,
+        "hedge_after_ms": 100
+    },
+    # Non-critical writes (last_login, analytics counters, activity events)
+    "background": {
+        "read_preference": Primary(),
+        "write_concern": WriteConcern(w=1, wtimeout=2000),
+        "max_time_ms": 2000,
+        "deadline_ms": 2500
+    },
+    # Latency-tolerant listings that may lag the primary slightly
+    "history": {
+        "read_preference": SecondaryPreferred(max_staleness=90),
+        "write_concern": WriteConcern(w="majority", wtimeout=2000),
+        "max_time_ms": 2000,
+        "deadline_ms": 2500,
+        "hedge_after_ms": 150
+    },
+    # Long bulk scans (exports, recommendation snapshots)
+    "export": {
+        "read_preference": SecondaryPreferred(max_staleness=90),
+        "write_concern": WriteConcern(w="majority", wtimeout=5000),
+        "max_time_ms": 120000,
+        "deadline_ms": 125000
+    },
+    # Admin aggregation rebuilds
+    "admin": {
+        "read_preference": Primary(),
+        "write_concern": WriteConcern(w="majority", wtimeout=30000),
+        "max_time_ms": 60000,
+        "deadline_ms": 65000
+    }
+}
+
+DEFAULT_PROFILE = "primary"
+
+logger = logging.getLogger(__name__)
+
 def get_mongo_client() -> AsyncIOMotorClient:
-    """Get MongoDB client with connection pooling for serverless"""
+    """Get MongoDB client with connection pooling sized for the deployment mode"""
     global _mongo_client
-    
+
     if _mongo_client is None:
         mongo_url = os.environ.get('MONGO_URL')
         if not mongo_url:
             raise ValueError("MONGO_URL environment variable is required")
-        
-        # Configure for serverless with minimal connections
+
+        mode = os.environ.get('DEPLOYMENT_MODE', 'serverless')
+        if mode not in POOL_PROFILES:
+            raise ValueError(f"Unknown DEPLOYMENT_MODE: {mode}")
+
         _mongo_client = AsyncIOMotorClient(
             mongo_url,
-            maxPoolSize=1,  # Minimal pool for serverless
-            minPoolSize=0,
-            maxIdleTimeMS=30000,  # Close idle connections quickly
             connectTimeoutMS=5000,
-            serverSelectionTimeoutMS=5000
+            serverSelectionTimeoutMS=5000,
+            **POOL_PROFILES[mode]
         )
-    
+
     return _mongo_client
 
-async def get_database():
-    """Get database instance"""
+def profile_settings(profile: str) -> Dict[str, Any]:
+    """Settings for a profile name; unknown names fall back to the default"""
+    settings = DB_PROFILES.get(profile)
+    if settings is None:
+        logger.warning("Unknown database profile %r, using %r", profile, DEFAULT_PROFILE)
+        settings = DB_PROFILES[DEFAULT_PROFILE]
+    return settings
+
+def with_profile(db, profile: str):
+    """The same database using a profile's read preference and write concern"""
+    if db is None:
+        return None
+
+    settings = profile_settings(profile)
+    return db.client.get_database(
+        db.name,
+        read_preference=settings["read_preference"],
+        write_concern=settings["write_concern"]
+    )
+
+def max_time_ms(profile: str) -> int:
+    """Server-side time limit for reads made under a profile"""
+    return profile_settings(profile)["max_time_ms"]
+
+async def get_database(profile: str = DEFAULT_PROFILE):
+    """Get database instance configured for a profile"""
     client = get_mongo_client()
     db_name = os.environ.get('DB_NAME')
     if not db_name:
         raise ValueError("DB_NAME environment variable is required")
-    
-    return client[db_name]
\ No newline at end of file
+
+    return with_profile(client[db_name], profile)
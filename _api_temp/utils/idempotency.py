@@ -0,0 +1,199 @@
+"""Idempotency-Key support for write endpoints"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from .storage import get_storage
+from .auth import decode_token
+from .indexes import ensure_indexes, IDEMPOTENCY_TTL_SECONDS
+from .resilience import DatabaseUnavailableError, resilient_read, resilient_write
+from .response import error_response, service_unavailable_response
+
+IDEMPOTENCY_CACHE_SIZE = 1000
+IDEMPOTENCY_WAIT_SECONDS = 10.0
+IDEMPOTENCY_POLL_SECONDS = 0.1
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# A key still in progress after this long was claimed by a process that
+# died, and may be claimed again
+IDEMPOTENCY_LEASE_SECONDS = 30
+
+# Front cache of completed responses: key -> (expires_at, fingerprint, response)
+_response_cache: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+
+# Requests currently executing in this process: key -> future of (fingerprint, response)
+_in_flight: Dict[str, asyncio.Future] = {}
+
+def _cache_get(cache_key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    entry = _response_cache.get(cache_key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _response_cache[cache_key]
+        return None
+    _response_cache.move_to_end(cache_key)
+    return entry[1], entry[2]
+
+def _cache_set(cache_key: str, fingerprint: str, response: Dict[str, Any]) -> None:
+    _response_cache[cache_key] = (time.monotonic() + IDEMPOTENCY_TTL_SECONDS, fingerprint, response)
+    _response_cache.move_to_end(cache_key)
+    while len(_response_cache) > IDEMPOTENCY_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+def _replay(stored: Tuple[str, Dict[str, Any]], fingerprint: str) -> Dict[str, Any]:
+    """Return the stored response, refusing keys reused for a different body"""
+    stored_fingerprint, response = stored
+    if stored_fingerprint != fingerprint:
+        return error_response(422, "Idempotency-Key was already used with a different request body")
+
+    replay = dict(response)
+    replay["headers"] = {**response.get("headers", {}), "Idempotent-Replayed": "true"}
+    return replay
+
+def _lease_expired(stored: Dict[str, Any]) -> bool:
+    claimed_at = stored.get("claimed_at") or stored["created_at"]
+    return claimed_at < datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+
+async def _wait_for_stored(db, cache_key: str) -> Optional[Dict[str, Any]]:
+    """Poll for the response of a request executing in another process"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        stored = await resilient_read(lambda: db.idempotency_keys.find_one({"_id": cache_key}))
+        if stored is None or stored["status"] == "completed" or _lease_expired(stored):
+            return stored
+        if time.monotonic() >= deadline:
+            return stored
+        await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+async def _reclaim(db, stored: Dict[str, Any], fingerprint: str) -> Optional[datetime]:
+    """Take over a key whose lease expired; returns the new claim time if this call won"""
+    claimed_at = datetime.utcnow()
+    claimed = await resilient_write(lambda: db.idempotency_keys.find_one_and_update(
+        {"_id": stored["_id"], "status": "in_progress", "claimed_at": stored.get("claimed_at")},
+        {"$set": {"fingerprint": fingerprint, "claimed_at": claimed_at}}
+    ))
+    return claimed_at if claimed is not None else None
+
+async def _execute(cache_key: str, fingerprint: str, run) -> Tuple[str, Dict[str, Any], bool]:
+    """Claim the key in the shared store and run the handler once"""
+    db = (await get_storage()).db
+    await resilient_write(lambda: ensure_indexes(db, "idempotency_keys"))
+
+    while True:
+        claimed_at = datetime.utcnow()
+        try:
+            await resilient_write(lambda: db.idempotency_keys.insert_one({
+                "_id": cache_key,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "claimed_at": claimed_at,
+                "created_at": claimed_at
+            }))
+            break
+        except DuplicateKeyError:
+            stored = await _wait_for_stored(db, cache_key)
+            if stored is None:
+                # The original failed and released the key, so claim it again
+                continue
+            if stored["status"] == "completed":
+                return stored["fingerprint"], stored["response"], True
+            if _lease_expired(stored):
+                claimed_at = await _reclaim(db, stored, fingerprint)
+                if claimed_at is None:
+                    # Another retry reclaimed it first
+                    continue
+                break
+            return fingerprint, error_response(409, "A request with this Idempotency-Key is still in progress"), False
+
+    # Only release or complete the claim this call holds
+    claim = {"_id": cache_key, "claimed_at": claimed_at}
+    try:
+        response = await run()
+    except BaseException:
+        await resilient_write(lambda: db.idempotency_keys.delete_one(claim))
+        raise
+
+    if response["statusCode"] >= 500:
+        # Let the client retry server errors
+        await resilient_write(lambda: db.idempotency_keys.delete_one(claim))
+    else:
+        await resilient_write(lambda: db.idempotency_keys.update_one(
+            claim,
+            {"$set": {"status": "completed", "response": response}}
+        ))
+    return fingerprint, response, False
+
+async def run_idempotent(cache_key: str, fingerprint: str, run) -> Dict[str, Any]:
+    """Run a write once per key, replaying the stored response for duplicates"""
+    loop = asyncio.get_running_loop()
+    while True:
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            return _replay(cached, fingerprint)
+
+        future = _in_flight.get(cache_key)
+        if future is None or future.get_loop() is not loop:
+            break
+
+        # Wait for the in-flight original instead of executing again
+        result = await asyncio.shield(future)
+        if result is not None:
+            return _replay(result, fingerprint)
+
+    future = loop.create_future()
+    _in_flight[cache_key] = future
+    try:
+        stored_fingerprint, response, replayed = await _execute(cache_key, fingerprint, run)
+    except BaseException:
+        future.set_result(None)
+        raise
+    finally:
+        _in_flight.pop(cache_key, None)
+
+    future.set_result((stored_fingerprint, response))
+    if response["statusCode"] < 500 and response["statusCode"] != 409:
+        _cache_set(cache_key, stored_fingerprint, response)
+
+    if replayed:
+        return _replay((stored_fingerprint, response), fingerprint)
+    return response
+
+def idempotent(scope: str):
+    """Decorate a POST handler so retries with an Idempotency-Key are not re-executed"""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(event, context):
+            headers = event.get('headers') or {}
+            key = headers.get('idempotency-key') or headers.get('Idempotency-Key')
+            if not key or event.get('httpMethod', 'POST') != 'POST':
+                return await handler(event, context)
+
+            if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+                return error_response(400, "Invalid input", "Idempotency-Key is too long")
+
+            # Scope keys per user; unauthenticated requests are rejected by the handler
+            auth_header = headers.get('authorization') or headers.get('Authorization')
+            token_data = None
+            if auth_header and auth_header.startswith('Bearer '):
+                token_data = decode_token(auth_header.split(' ')[1])
+            if not token_data:
+                return await handler(event, context)
+
+            # The shared key store needs MongoDB
+            if (await get_storage()).db is None:
+                return await handler(event, context)
+
+            cache_key = f"{scope}:{token_data['user_id']}:{key}"
+            fingerprint = hashlib.sha256((event.get('body') or '').encode()).hexdigest()
+            try:
+                return await run_idempotent(cache_key, fingerprint, lambda: handler(event, context))
+            except DatabaseUnavailableError as e:
+                return service_unavailable_response(e.retry_after, str(e))
+        return wrapper
+    return decorator
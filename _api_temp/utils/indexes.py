@@ -0,0 +1,84 @@
+"""Index definitions for serverless functions"""
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Seconds before stored Idempotency-Key responses expire
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+
+# Indexes per collection, created lazily by the handlers that rely on them
+COLLECTION_INDEXES: Dict[str, List[IndexModel]] = {
+    # Registration and imports detect duplicate emails through this index
+    "users": [
+        IndexModel("email", unique=True),
+    ],
+    "user_stories": [
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING)],
+            name="user_created"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("project_name", ASCENDING), ("created_at", DESCENDING)],
+            name="user_project_created"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("stories.category", ASCENDING), ("stories.priority", ASCENDING)],
+            name="user_story_category_priority"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("stories.search_terms", ASCENDING)],
+            name="user_story_search_terms"
+        ),
+    ],
+    "idempotency_keys": [
+        IndexModel(
+            [("created_at", ASCENDING)],
+            name="created_ttl",
+            expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS
+        ),
+    ],
+    "revoked_tokens": [
+        IndexModel(
+            [("expires_at", ASCENDING)],
+            name="expires_ttl",
+            expireAfterSeconds=0
+        ),
+        IndexModel(
+            [("revoked_at", ASCENDING)],
+            name="revoked_at"
+        ),
+    ],
+    "rate_limits": [
+        IndexModel(
+            [("expires_at", ASCENDING)],
+            name="expires_ttl",
+            expireAfterSeconds=0
+        ),
+    ],
+    "learner_activity": [
+        IndexModel(
+            [("expires_at", ASCENDING)],
+            name="expires_ttl",
+            expireAfterSeconds=0
+        ),
+    ],
+    "activity_events": [
+        IndexModel(
+            [("user_id", ASCENDING), ("day", DESCENDING), ("count", ASCENDING)],
+            name="user_day_count"
+        ),
+    ],
+}
+
+# Collections whose indexes were already ensured by this process
+_ensured_collections = set()
+
+async def ensure_indexes(db, collection: str) -> None:
+    """Create the indexes for a collection once per process"""
+    if collection in _ensured_collections:
+        return
+    
+    indexes = COLLECTION_INDEXES.get(collection)
+    if indexes:
+        await db[collection].create_indexes(indexes)
+    _ensured_collections.add(collection)
@@ -1,6 +1,6 @@
 """Pydantic models for API validation"""
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, model_validator
+from typing import List, Optional, Dict, Any, Literal, Union
 from datetime import datetime
 
 # User models
@@ -47,6 +47,19 @@ class AssessmentSubmission(BaseModel):
     answers: Dict[str, Any]
     score: float
 
+# Offline sync models
+MAX_SYNC_ITEMS = 500
+
+class ProgressSyncUpdate(ProgressUpdate):
+    client_timestamp: datetime
+
+class AssessmentSyncSubmission(AssessmentSubmission):
+    client_timestamp: datetime
+
+class ProgressSync(BaseModel):
+    updates: List[ProgressSyncUpdate] = Field(default_factory=list, max_length=MAX_SYNC_ITEMS)
+    assessments: List[AssessmentSyncSubmission] = Field(default_factory=list, max_length=MAX_SYNC_ITEMS)
+
 class ProgressResponse(BaseModel):
     completed_sections: List[str]
     module_progress: Dict[str, ModuleProgress]
@@ -72,6 +85,53 @@ class RiceCalculationResponse(BaseModel):
     score: float
     created_at: datetime
 
+# RICE what-if models
+MAX_WHAT_IF_FEATURES = 1000
+MAX_WHAT_IF_SAMPLES = 10000
+
+class RiceRange(BaseModel):
+    min: float
+    max: float
+    mode: Optional[float] = None
+    distribution: Literal["uniform", "triangular"] = "uniform"
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.min > self.max:
+            raise ValueError("min must not exceed max")
+        if self.mode is not None and not self.min <= self.mode <= self.max:
+            raise ValueError("mode must lie between min and max")
+        return self
+
+class RiceWhatIfFeature(BaseModel):
+    feature_name: str
+    reach: Union[float, RiceRange]
+    impact: Union[float, RiceRange]
+    confidence: Union[float, RiceRange]
+    effort: Union[float, RiceRange]
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        def bounds(value):
+            return (value, value) if isinstance(value, (int, float)) else (value.min, value.max)
+        if bounds(self.reach)[0] < 0:
+            raise ValueError("reach must be >= 0")
+        if bounds(self.impact)[0] < 0 or bounds(self.impact)[1] > 10:
+            raise ValueError("impact must be between 0 and 10")
+        if bounds(self.confidence)[0] < 0 or bounds(self.confidence)[1] > 100:
+            raise ValueError("confidence must be between 0 and 100")
+        if bounds(self.effort)[0] <= 0:
+            raise ValueError("effort must be > 0")
+        return self
+
+class RiceWhatIfRequest(BaseModel):
+    features: List[RiceWhatIfFeature] = Field(..., min_length=1, max_length=MAX_WHAT_IF_FEATURES)
+    method: Literal["monte_carlo", "grid"] = "monte_carlo"
+    samples: int = Field(1000, ge=1, le=MAX_WHAT_IF_SAMPLES)
+    grid_steps: int = Field(5, ge=2, le=10)
+    top_k: int = Field(3, ge=1)
+    seed: Optional[int] = None
+
 class Story(BaseModel):
     story: str
     category: str
@@ -79,4 +139,18 @@ class Story(BaseModel):
 
 class UserStoryCreate(BaseModel):
     project_name: str
-    stories: List[Story]
\ No newline at end of file
+    stories: List[Story]
+
+# Batch models
+MAX_BATCH_SIZE = 20
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    body: Optional[Dict[str, Any]] = None
+    query: Optional[Dict[str, str]] = None
+    idempotency_key: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
@@ -0,0 +1,259 @@
+"""Bulk cohort onboarding
+
+Creates learners from a CSV (email,name,password header) or NDJSON file.
+Rows are validated like /api/auth/register, deduplicated against the file
+and against existing users with a single lookup, then hashed across a
+process pool and written chunk by chunk (the next chunk is hashed while the
+current one is written). The report lists per-row errors, users created
+without a progress document, and throughput.
+
+Import from the command line with:
+
+    python -m _api_temp.utils.onboarding users.csv [csv|ndjson]
+"""
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pydantic import ValidationError
+
+from .analytics import analytics_recorder, record_new_learner
+from .auth import get_password_hash
+from .models import UserCreate
+from .resilience import DatabaseUnavailableError
+from .storage import StorageBackend, get_storage
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Largest file accepted in one import from the command line
+MAX_IMPORT_ROWS = 5000
+
+# Largest file accepted by the endpoint, which must finish within the
+# function timeout (bcrypt costs about 0.4 s per row per core)
+MAX_REQUEST_IMPORT_ROWS = 100
+
+# Users (and their progress documents) written per insert_many
+IMPORT_CHUNK_SIZE = 500
+
+# Passwords hashed per process-pool task, to amortize pickling overhead
+HASH_BATCH_SIZE = 25
+
+IMPORT_HASH_WORKERS = int(os.environ.get("IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+
+MODULE_IDS = ("pm-basics", "discovery", "product-sense", "metrics", "ai-era", "tools")
+
+class OnboardingError(ValueError):
+    """Raised when the file as a whole cannot be imported"""
+
+def parse_rows(text: str, import_format: str,
+               max_rows: int = MAX_IMPORT_ROWS) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Split a file into (line number, fields) rows and per-row parse errors"""
+    rows, errors = [], []
+    if import_format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"email", "name", "password"} - set(reader.fieldnames or [])
+        if missing:
+            raise OnboardingError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        for fields in reader:
+            rows.append((reader.line_num, fields))
+    elif import_format == "ndjson":
+        for line_number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                fields = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append({"row": line_number, "email": None, "error": f"Invalid JSON: {e.msg}"})
+                continue
+            if not isinstance(fields, dict):
+                errors.append({"row": line_number, "email": None, "error": "Expected a JSON object"})
+                continue
+            rows.append((line_number, fields))
+    else:
+        raise OnboardingError(f"format must be one of {', '.join(IMPORT_FORMATS)}")
+
+    if len(rows) + len(errors) > max_rows:
+        raise OnboardingError(f"At most {max_rows} rows can be imported at once")
+    return rows, errors
+
+def validation_message(error: ValidationError) -> str:
+    """One line per invalid field"""
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Process-pool task: bcrypt a batch of passwords"""
+    return [get_password_hash(password) for password in passwords]
+
+# Hashing pool shared by imports in this process
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+
+    if _hash_pool is None:
+        # Motor runs its I/O on threads, so workers are spawned rather than forked
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=IMPORT_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+async def hash_all(passwords: List[str]) -> List[str]:
+    """bcrypt every password across the process pool, preserving order"""
+    loop = asyncio.get_running_loop()
+    pool = get_hash_pool()
+    batches = await asyncio.gather(*[
+        loop.run_in_executor(pool, hash_passwords, passwords[start:start + HASH_BATCH_SIZE])
+        for start in range(0, len(passwords), HASH_BATCH_SIZE)
+    ])
+    return [hashed for batch in batches for hashed in batch]
+
+def new_progress_document(user_id: ObjectId, now: datetime) -> Dict[str, Any]:
+    """Empty progress document for a new learner (registration, imports and first progress read)"""
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "completed_sections": [],
+        "module_progress": {module_id: {"completed": False, "completed_at": None} for module_id in MODULE_IDS},
+        "assessment_scores": [],
+        "total_progress": 0.0,
+        "last_accessed_module": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+async def _write_chunk(storage: StorageBackend, chunk: List[Tuple[int, UserCreate]], hashes: List[str],
+                       now: datetime, errors: List[Dict[str, Any]], missing_progress: List[Dict[str, Any]]) -> int:
+    """Insert one chunk of users and their progress documents; returns users created"""
+    users = [
+        {
+            "_id": ObjectId(),
+            "email": user.email,
+            "password": password_hash,
+            "name": user.name,
+            "role": "learner",
+            "created_at": now,
+            "updated_at": now,
+            "last_login": None
+        }
+        for (_, user), password_hash in zip(chunk, hashes)
+    ]
+
+    try:
+        rejected = await storage.insert_users(users)
+    except DatabaseUnavailableError:
+        # Part of the chunk may have been written; a re-run reports those rows as registered
+        errors.extend(
+            {"row": line_number, "email": user.email,
+             "error": "Database unavailable, the row may not have been created; re-run the import"}
+            for line_number, user in chunk
+        )
+        return 0
+
+    for index, error in rejected.items():
+        line_number, user = chunk[index]
+        errors.append({"row": line_number, "email": user.email, "error": error})
+
+    inserted = [(chunk[index][0], user) for index, user in enumerate(users) if index not in rejected]
+    if inserted:
+        try:
+            await storage.insert_progress_many([new_progress_document(user["_id"], now) for _, user in inserted])
+        except DatabaseUnavailableError:
+            # The users exist, so a re-run would skip them; their progress is created on first access
+            missing_progress.extend(
+                {"row": line_number, "email": user["email"], "user_id": str(user["_id"])}
+                for line_number, user in inserted
+            )
+    return len(inserted)
+
+async def import_users(storage: StorageBackend, text: str, import_format: str,
+                       max_rows: int = MAX_IMPORT_ROWS) -> Dict[str, Any]:
+    """Create learners from a CSV/NDJSON file and report per-row outcomes"""
+    started = time.perf_counter()
+    rows, errors = parse_rows(text, import_format, max_rows)
+    total_rows = len(rows) + len(errors)
+
+    # Validate and drop duplicates within the file
+    candidates: List[Tuple[int, UserCreate]] = []
+    seen: Dict[str, int] = {}
+    for line_number, fields in rows:
+        try:
+            user = UserCreate(**fields)
+        except ValidationError as e:
+            errors.append({"row": line_number, "email": fields.get("email"), "error": validation_message(e)})
+            continue
+        if user.email in seen:
+            errors.append({"row": line_number, "email": user.email, "error": f"Duplicate of row {seen[user.email]}"})
+            continue
+        seen[user.email] = line_number
+        candidates.append((line_number, user))
+
+    # One lookup for every email already registered
+    existing = await storage.find_existing_emails([user.email for _, user in candidates]) if candidates else set()
+    for line_number, user in candidates:
+        if user.email in existing:
+            errors.append({"row": line_number, "email": user.email, "error": "Email already registered"})
+    candidates = [(line_number, user) for line_number, user in candidates if user.email not in existing]
+    validated = time.perf_counter()
+
+    # Hash the next chunk while the current one is written, so at most two
+    # chunks of hashes are held and writes start after the first chunk
+    chunks = [candidates[start:start + IMPORT_CHUNK_SIZE] for start in range(0, len(candidates), IMPORT_CHUNK_SIZE)]
+    now = datetime.utcnow()
+    created = 0
+    missing_progress: List[Dict[str, Any]] = []
+    hash_wait = write_time = 0.0
+    hashing = asyncio.ensure_future(hash_all([user.password for _, user in chunks[0]])) if chunks else None
+    try:
+        for index, chunk in enumerate(chunks):
+            waited = time.perf_counter()
+            hashes = await hashing
+            hash_wait += time.perf_counter() - waited
+            if index + 1 < len(chunks):
+                hashing = asyncio.ensure_future(hash_all([user.password for _, user in chunks[index + 1]]))
+
+            writing = time.perf_counter()
+            created += await _write_chunk(storage, chunk, hashes, now, errors, missing_progress)
+            write_time += time.perf_counter() - writing
+    finally:
+        if hashing is not None and not hashing.done():
+            hashing.cancel()
+
+    await analytics_recorder.record(record_new_learner, storage.database("background"), created)
+    finished = time.perf_counter()
+
+    elapsed = finished - started
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "rows": total_rows,
+        "created": created,
+        "failed": len(errors),
+        "errors": errors,
+        "missing_progress": missing_progress,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_second": round(created / elapsed, 1) if elapsed > 0 else 0.0,
+        "timings_ms": {
+            "validate": round((validated - started) * 1000, 1),
+            "hash_wait": round(hash_wait * 1000, 1),
+            "write": round(write_time * 1000, 1)
+        }
+    }
+
+async def _import_file(path: str, import_format: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return await import_users(await get_storage(), text, import_format)
+
+if __name__ == "__main__":
+    file_path = sys.argv[1]
+    file_format = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(file_path)[1].lstrip(".").lower()
+    print(json.dumps(asyncio.run(_import_file(file_path, file_format)), indent=2))
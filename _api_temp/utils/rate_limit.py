@@ -0,0 +1,153 @@
+"""Rate limiting and admission control for auth endpoints"""
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Sequence, Tuple
+
+from pymongo import ReturnDocument
+
+from .indexes import ensure_indexes
+from .resilience import resilient_write
+
+# "memory" keeps limits per process; "mongo" also enforces them across processes
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+
+# Idle buckets are pruned once this many keys are tracked
+MAX_TRACKED_KEYS = 10000
+
+class TokenBucket:
+    """In-process token buckets keyed by client IP, email, etc."""
+
+    def __init__(self, capacity: int, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def hit(self, key: str) -> float:
+        """Take one token; return 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.refill_per_second
+
+        if key not in self._buckets and len(self._buckets) >= MAX_TRACKED_KEYS:
+            self._prune(now)
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+    def _prune(self, now: float) -> None:
+        """Drop buckets that have refilled completely"""
+        full_after = self.capacity / self.refill_per_second
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket[1] < full_after
+        }
+
+class RateLimit:
+    """Allow `limit` requests per `period` seconds for each key"""
+
+    def __init__(self, name: str, limit: int, period: int):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self._bucket = TokenBucket(limit, limit / period)
+
+    async def check(self, db, key: str) -> float:
+        """Return 0 if allowed, else the Retry-After in seconds"""
+        # In-process fast path rejects bursts without a database round trip
+        retry_after = self._bucket.hit(key)
+        if retry_after or RATE_LIMIT_BACKEND != "mongo" or db is None:
+            return retry_after
+        return await self._check_shared(db, key)
+
+    async def _check_shared(self, db, key: str) -> float:
+        """Fixed-window counter shared by all processes"""
+        now = time.time()
+        window = int(now // self.period)
+        window_end = (window + 1) * self.period
+
+        async def increment():
+            await ensure_indexes(db, "rate_limits")
+            return await db.rate_limits.find_one_and_update(
+                {"_id": f"{self.name}:{key}:{window}"},
+                {
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {"expires_at": datetime.utcfromtimestamp(window_end)}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+
+        counter = await resilient_write(increment, "background")
+        if counter["count"] > self.limit:
+            return window_end - now
+        return 0.0
+
+LOGIN_IP_LIMIT = RateLimit("login-ip", limit=20, period=60)
+LOGIN_EMAIL_LIMIT = RateLimit("login-email", limit=5, period=60)
+REGISTER_IP_LIMIT = RateLimit("register-ip", limit=5, period=60)
+
+async def check_rate_limits(db, checks: Iterable[Tuple[RateLimit, str]]) -> int:
+    """Apply limits in order; return the Retry-After seconds of the first rejection, or 0"""
+    for rate_limit, key in checks:
+        retry_after = await rate_limit.check(db, key)
+        if retry_after:
+            return max(1, math.ceil(retry_after))
+    return 0
+
+def client_ip(event) -> str:
+    """Best-effort client IP from proxy headers"""
+    headers = event.get('headers') or {}
+    forwarded = headers.get('x-forwarded-for') or headers.get('X-Forwarded-For')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return (
+        headers.get('x-real-ip')
+        or headers.get('X-Real-IP')
+        or (event.get('requestContext') or {}).get('identity', {}).get('sourceIp')
+        or "unknown"
+    )
+
+class AdmissionController:
+    """Shed load once too many password hashes are queued or running
+
+    Each client key (IP, email) may hold at most max_per_key slots, so one
+    flood cannot take every slot from other clients.
+    """
+
+    def __init__(self, max_in_flight: int, max_per_key: int):
+        self.max_in_flight = max_in_flight
+        self.max_per_key = max_per_key
+        self.in_flight = 0
+        self.shed = 0
+        self._in_flight_by_key: Dict[str, int] = {}
+
+    def try_acquire(self, keys: Sequence[str] = ()) -> bool:
+        if self.in_flight >= self.max_in_flight or any(
+            self._in_flight_by_key.get(key, 0) >= self.max_per_key for key in keys
+        ):
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        for key in keys:
+            self._in_flight_by_key[key] = self._in_flight_by_key.get(key, 0) + 1
+        return True
+
+    def release(self, keys: Sequence[str] = ()) -> None:
+        self.in_flight -= 1
+        for key in keys:
+            remaining = self._in_flight_by_key[key] - 1
+            if remaining:
+                self._in_flight_by_key[key] = remaining
+            else:
+                del self._in_flight_by_key[key]
+
+BCRYPT_MAX_IN_FLIGHT = int(os.environ.get("BCRYPT_MAX_IN_FLIGHT", (os.cpu_count() or 1) * 4))
+BCRYPT_MAX_IN_FLIGHT_PER_CLIENT = max(1, BCRYPT_MAX_IN_FLIGHT // 4)
+BCRYPT_RETRY_AFTER_SECONDS = 1
+
+bcrypt_admission = AdmissionController(BCRYPT_MAX_IN_FLIGHT, BCRYPT_MAX_IN_FLIGHT_PER_CLIENT)
@@ -0,0 +1,250 @@
+"""Precomputed section recommendations
+
+A batch job builds an item-item co-completion matrix over sections from
+user_progress and snapshots it to .npy files. Request handlers
+memory-map the snapshot and score recommendations for one user from that
+user's own progress, without reading anyone else's data.
+
+Each build writes a new versioned directory, then atomically replaces
+manifest.json, which names the current version. Readers follow the
+manifest, so they see either the old or the new snapshot, never a mix, and
+reload when it changes.
+
+Rebuild the snapshot with:
+
+    python -m _api_temp.utils.recommendations [output_dir]
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .database import max_time_ms
+from .resilience import resilient_call
+
+RECOMMENDATIONS_PATH = os.environ.get(
+    "RECOMMENDATIONS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "recommendations")
+)
+
+# Neighbors kept per section in the snapshot
+MAX_NEIGHBORS = 20
+
+# Assessment scores below this (0-100) mark a weak area
+PASSING_SCORE = 60.0
+
+# Weight of weak-area signals relative to co-completion similarity
+WEAK_AREA_WEIGHT = 0.5
+
+MANIFEST_FILE = "manifest.json"
+
+# Snapshot versions kept on disk; the previous one stays for readers that
+# loaded its manifest just before a swap
+KEPT_VERSIONS = 2
+ARRAY_FILES = ("neighbors", "weights", "popularity", "assessment_affinity")
+
+def latest_assessment_scores(assessment_scores: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    """Most recent score per assessment_id"""
+    latest = {}
+    for score in sorted(assessment_scores, key=lambda s: s.get("completed_at") or datetime.min):
+        latest[score["assessment_id"]] = score["score"]
+    return latest
+
+def top_k_neighbors(similarity: sparse.csr_matrix, k: int):
+    """Keep the k strongest neighbors of each row (-1 pads missing ones)"""
+    rows = similarity.shape[0]
+    neighbors = np.full((rows, k), -1, dtype=np.int32)
+    weights = np.zeros((rows, k), dtype=np.float32)
+    for row in range(rows):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        data = similarity.data[start:end]
+        indices = similarity.indices[start:end]
+        if len(data) > k:
+            keep = np.argpartition(-data, k - 1)[:k]
+            data, indices = data[keep], indices[keep]
+        order = np.argsort(-data)
+        neighbors[row, :len(order)] = indices[order]
+        weights[row, :len(order)] = data[order]
+    return neighbors, weights
+
+async def build_snapshot(db, path: str = RECOMMENDATIONS_PATH, k: int = MAX_NEIGHBORS) -> Dict[str, Any]:
+    """Build the co-completion snapshot from all user_progress documents"""
+    section_index: Dict[str, int] = {}
+    assessment_index: Dict[str, int] = {}
+    section_rows: List[int] = []
+    section_cols: List[int] = []
+    passed_rows: List[int] = []
+    passed_cols: List[int] = []
+
+    async def scan() -> int:
+        # A retry-free call starts the scan once, so the lists are only filled once
+        users = 0
+        cursor = db.user_progress.find(
+            {}, {"completed_sections": 1, "assessment_scores": 1}
+        ).batch_size(1000).max_time_ms(max_time_ms("export"))
+        async for progress in cursor:
+            for section_id in set(progress.get("completed_sections", [])):
+                section_rows.append(users)
+                section_cols.append(section_index.setdefault(section_id, len(section_index)))
+            for assessment_id, score in latest_assessment_scores(progress.get("assessment_scores", [])).items():
+                column = assessment_index.setdefault(assessment_id, len(assessment_index))
+                if score >= PASSING_SCORE:
+                    passed_rows.append(users)
+                    passed_cols.append(column)
+            users += 1
+        return users
+
+    users = await resilient_call(scan, "export")
+
+    sections = len(section_index)
+    completions = sparse.csr_matrix(
+        (np.ones(len(section_rows), dtype=np.float32), (section_rows, section_cols)),
+        shape=(users, sections)
+    )
+    passes = sparse.csr_matrix(
+        (np.ones(len(passed_rows), dtype=np.float32), (passed_rows, passed_cols)),
+        shape=(users, len(assessment_index))
+    )
+
+    # Cosine similarity between section completion vectors
+    popularity = np.asarray(completions.sum(axis=0)).ravel().astype(np.float32)
+    co_completion = (completions.T @ completions).tocsr()
+    co_completion.setdiag(0)
+    co_completion.eliminate_zeros()
+    norms = np.sqrt(popularity)
+    norms[norms == 0] = 1
+    scale = sparse.diags(1 / norms)
+    similarity = (scale @ co_completion @ scale).tocsr()
+    neighbors, weights = top_k_neighbors(similarity, k)
+
+    # Lift of each section among learners who passed each assessment
+    pass_counts = np.asarray(passes.sum(axis=0)).ravel()
+    pass_counts[pass_counts == 0] = 1
+    completion_rate = popularity / max(users, 1)
+    assessment_affinity = (passes.T @ completions).toarray() / pass_counts[:, None] - completion_rate
+    assessment_affinity = np.clip(assessment_affinity, 0, None).astype(np.float32)
+
+    manifest = {
+        "version": f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}",
+        "sections": sorted(section_index, key=section_index.get),
+        "assessments": sorted(assessment_index, key=assessment_index.get),
+        "users": users,
+        "built_at": datetime.utcnow().isoformat()
+    }
+    arrays = {
+        "neighbors": neighbors,
+        "weights": weights,
+        "popularity": popularity / max(users, 1),
+        "assessment_affinity": assessment_affinity
+    }
+
+    write_snapshot(path, manifest, arrays)
+    return {"sections": sections, "assessments": len(assessment_index), "users": users}
+
+def write_snapshot(path: str, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """Write a new version directory, then point the manifest at it"""
+    os.makedirs(path, exist_ok=True)
+    version = manifest["version"]
+    version_path = os.path.join(path, version)
+    os.makedirs(version_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(version_path, f"{name}.npy"), array)
+
+    # os.replace is atomic, so readers see the old manifest or the new one
+    staging = os.path.join(path, f"{MANIFEST_FILE}.{version}.tmp")
+    with open(staging, "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(staging, os.path.join(path, MANIFEST_FILE))
+
+    versions = sorted(
+        entry.name for entry in os.scandir(path) if entry.is_dir() and entry.name != version
+    )
+    for stale in versions[:max(0, len(versions) - (KEPT_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(path, stale), ignore_errors=True)
+
+class Recommender:
+    """Memory-mapped snapshot answering top-k queries for a single user"""
+
+    def __init__(self, path: str = RECOMMENDATIONS_PATH):
+        with open(os.path.join(path, MANIFEST_FILE)) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.version: str = manifest["version"]
+        self.sections: List[str] = manifest["sections"]
+        self.section_index = {section_id: i for i, section_id in enumerate(self.sections)}
+        self.assessment_index = {assessment_id: i for i, assessment_id in enumerate(manifest["assessments"])}
+        self.built_at = manifest["built_at"]
+        for name in ARRAY_FILES:
+            setattr(self, name, np.load(os.path.join(path, self.version, f"{name}.npy"), mmap_mode="r"))
+
+    def recommend(self, completed_sections: Iterable[str], assessment_scores: Iterable[Dict[str, Any]],
+                  k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k uncompleted sections for a learner"""
+        scores = np.zeros(len(self.sections), dtype=np.float32)
+        completed = [self.section_index[s] for s in set(completed_sections) if s in self.section_index]
+
+        if completed:
+            neighbors = self.neighbors[completed]
+            valid = neighbors >= 0
+            np.add.at(scores, neighbors[valid], self.weights[completed][valid])
+
+        weak = [
+            self.assessment_index[assessment_id]
+            for assessment_id, score in latest_assessment_scores(assessment_scores).items()
+            if score < PASSING_SCORE and assessment_id in self.assessment_index
+        ]
+        if weak:
+            scores += WEAK_AREA_WEIGHT * self.assessment_affinity[weak].sum(axis=0)
+
+        # Cold start falls back to the most completed sections
+        if not scores.any():
+            scores = np.array(self.popularity, dtype=np.float32)
+
+        scores[completed] = -np.inf
+        available = int(np.isfinite(scores).sum())
+        k = min(k, available)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{"section_id": self.sections[i], "score": float(scores[i])} for i in top]
+
+# Snapshot loaded by this process, and the manifest mtime it was loaded from
+_recommender: Optional[Recommender] = None
+_manifest_mtime: Optional[int] = None
+
+def get_recommender(path: str = RECOMMENDATIONS_PATH) -> Optional[Recommender]:
+    """Current snapshot, reloaded after a rebuild; None if none has been built"""
+    global _recommender, _manifest_mtime
+
+    try:
+        mtime = os.stat(os.path.join(path, MANIFEST_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    if _recommender is None or mtime != _manifest_mtime:
+        recommender = Recommender(path)
+        if _recommender is None or recommender.version != _recommender.version:
+            _recommender = recommender
+        _manifest_mtime = mtime
+
+    return _recommender
+
+async def _build_from_environment(path: str) -> Dict[str, Any]:
+    from .database import get_database
+    db = await get_database("export")
+    return await build_snapshot(db, path)
+
+if __name__ == "__main__":
+    output_path = sys.argv[1] if len(sys.argv) > 1 else RECOMMENDATIONS_PATH
+    print(json.dumps(asyncio.run(_build_from_environment(output_path))))
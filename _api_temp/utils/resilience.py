@@ -0,0 +1,238 @@
+"""Deadlines, bounded retries, hedged reads and a circuit breaker for MongoDB calls"""
+import asyncio
+import math
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, WTimeoutError
+
+from .database import DEFAULT_PROFILE, profile_settings
+
+T = TypeVar("T")
+
+# Errors that say the database is unhealthy rather than the request being wrong
+# (ConnectionFailure covers AutoReconnect, NetworkTimeout and server selection)
+TRANSIENT_ERRORS = (asyncio.TimeoutError, ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+# Retries for idempotent reads, with full-jitter exponential backoff
+READ_RETRIES = 2
+RETRY_BASE_DELAY_SECONDS = 0.05
+RETRY_MAX_DELAY_SECONDS = 0.5
+
+# Retries and hedges may add at most this fraction of extra calls
+RETRY_BUDGET_RATIO = 0.1
+RETRY_BUDGET_CAPACITY = 10
+
+# Race a second copy of slow reads in profiles that set hedge_after_ms
+HEDGED_READS = os.environ.get("MONGO_HEDGED_READS", "").lower() in ("1", "true", "yes")
+
+# Breaker opens when at least CIRCUIT_FAILURE_RATE of the calls in the last
+# CIRCUIT_WINDOW_SECONDS failed (and there were CIRCUIT_MIN_CALLS of them)
+CIRCUIT_FAILURE_RATE = 0.5
+CIRCUIT_MIN_CALLS = 10
+CIRCUIT_WINDOW_SECONDS = 30.0
+CIRCUIT_OPEN_SECONDS = 5.0
+
+class DatabaseUnavailableError(Exception):
+    """Raised when a call fails fast or exhausts its deadline; handlers answer 503"""
+
+    def __init__(self, retry_after: int, message: str = "Database temporarily unavailable"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class RetryBudget:
+    """Every call earns a fraction of a token; every retry or hedge spends one"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, capacity: float = RETRY_BUDGET_CAPACITY):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+
+    def deposit(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class CircuitBreaker:
+    """Fail fast once the recent error rate crosses a threshold"""
+
+    def __init__(
+        self,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._metrics = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.open_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the database now"""
+        state = self.state
+        if state == "closed":
+            return True
+        # Half open lets a single probe through; its outcome closes or reopens the breaker
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self._metrics["rejected"] += 1
+        return False
+
+    def record(self, failed: bool) -> None:
+        """Record the outcome of an allowed call"""
+        now = time.monotonic()
+        if self._opened_at is not None:
+            self._probe_in_flight = False
+            if failed:
+                self._opened_at = now
+            else:
+                self._opened_at = None
+                self._outcomes.clear()
+                self._failures = 0
+            return
+
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._failures -= self._outcomes.popleft()[1]
+
+        if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+            self._opened_at = now
+            self._metrics["opened"] += 1
+
+    def abandon(self) -> None:
+        """An allowed call was cancelled before it had an outcome"""
+        self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        """Seconds until the breaker will let a probe through"""
+        if self._opened_at is None:
+            return 1
+        return max(1, math.ceil(self.open_seconds - (time.monotonic() - self._opened_at)))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self._metrics, "state": self.state, "recent_calls": len(self._outcomes)}
+
+mongo_breaker = CircuitBreaker()
+retry_budget = RetryBudget()
+_metrics = {"calls": 0, "retries": 0, "hedges": 0, "failed_fast": 0}
+
+async def _hedged(operation: Callable[[], Awaitable[T]], timeout: float, hedge_after: float) -> T:
+    """Run operation; if it is still pending after hedge_after seconds, race a second copy"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = {asyncio.ensure_future(operation())}
+    hedged = False
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            wait_until = deadline if hedged else min(deadline, loop.time() + hedge_after)
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, wait_until - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+
+            if not hedged and not done and loop.time() < deadline:
+                hedged = True
+                if retry_budget.try_withdraw():
+                    _metrics["hedges"] += 1
+                    pending.add(asyncio.ensure_future(operation()))
+            elif not done:
+                raise asyncio.TimeoutError()
+
+        raise error or asyncio.TimeoutError()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def resilient_call(
+    operation: Callable[[], Awaitable[T]],
+    profile: str = DEFAULT_PROFILE,
+    retry: bool = False
+) -> T:
+    """Run a database call under the profile's deadline and the circuit breaker
+
+    `operation` is called once per attempt, so it must build a fresh cursor
+    or command each time. Only set `retry` for idempotent reads; writes rely
+    on the driver's retryWrites instead.
+    """
+    if not mongo_breaker.allow():
+        _metrics["failed_fast"] += 1
+        raise DatabaseUnavailableError(mongo_breaker.retry_after())
+
+    settings = profile_settings(profile)
+    hedge_after_ms = settings.get("hedge_after_ms") if retry and HEDGED_READS else None
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings["deadline_ms"] / 1000
+    _metrics["calls"] += 1
+    retry_budget.deposit()
+
+    attempt = 0
+    while True:
+        remaining = deadline - loop.time()
+        try:
+            if hedge_after_ms is not None:
+                result = await _hedged(operation, remaining, hedge_after_ms / 1000)
+            else:
+                result = await asyncio.wait_for(operation(), remaining)
+        except TRANSIENT_ERRORS as e:
+            attempt += 1
+            delay = random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+            if (
+                not retry
+                or attempt > READ_RETRIES
+                or loop.time() + delay >= deadline
+                or not retry_budget.try_withdraw()
+            ):
+                mongo_breaker.record(failed=True)
+                raise DatabaseUnavailableError(mongo_breaker.retry_after()) from e
+            _metrics["retries"] += 1
+            await asyncio.sleep(delay)
+            continue
+        except asyncio.CancelledError:
+            mongo_breaker.abandon()
+            raise
+        except Exception:
+            # The database answered; the request itself was at fault
+            mongo_breaker.record(failed=False)
+            raise
+
+        mongo_breaker.record(failed=False)
+        return result
+
+async def resilient_read(operation: Callable[[], Awaitable[T]], profile: str = DEFAULT_PROFILE) -> T:
+    """Idempotent read: deadline, jittered retries, optional hedging and the breaker"""
+    return await resilient_call(operation, profile, retry=True)
+
+async def resilient_write(operation: Callable[[], Awaitable[T]], profile: str = DEFAULT_PROFILE) -> T:
+    """Write: deadline and the breaker, no application-level retries"""
+    return await resilient_call(operation, profile, retry=False)
+
+def get_metrics() -> Dict[str, Any]:
+    return {**_metrics, "retry_budget": retry_budget.tokens, "breaker": mongo_breaker.get_metrics()}
@@ -2,6 +2,8 @@
 import json
 from typing import Any, Dict, Optional
 
+from .resilience import DatabaseUnavailableError
+
 def create_response(
     status_code: int = 200,
     body: Optional[Dict[str, Any]] = None,
@@ -12,7 +14,7 @@ def create_response(
         "Content-Type": "application/json",
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization"
+        "Access-Control-Allow-Headers": "Content-Type, Authorization, Idempotency-Key"
     }
     
     if headers:
@@ -36,6 +38,56 @@ def error_response(status_code: int, message: str, detail: Optional[str] = None)
     
     return create_response(status_code, error_body)
 
+def too_many_requests_response(retry_after: int, message: str = "Too many requests") -> Dict[str, Any]:
+    """Create 429 response with Retry-After header"""
+    return create_response(429, {"error": message}, {"Retry-After": str(retry_after)})
+
+def service_unavailable_response(retry_after: int, message: str = "Service temporarily unavailable") -> Dict[str, Any]:
+    """Create 503 response with Retry-After header"""
+    return create_response(503, {"error": message}, {"Retry-After": str(retry_after)})
+
 def success_response(data: Any, status_code: int = 200) -> Dict[str, Any]:
     """Create success response"""
-    return create_response(status_code, data)
\ No newline at end of file
+    return create_response(status_code, data)
+
+def streaming_response(chunks, content_type: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    """Create response whose body is an async iterator of text chunks"""
+    headers = {"Content-Type": content_type}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    
+    response = create_response(200, headers=headers)
+    response["body"] = chunks
+    response["isStreaming"] = True
+    return response
+
+async def buffer_streaming_response(coro, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Run a handler and join a streamed body for hosts that need a string
+
+    Stops reading with a 413 once the body passes max_bytes, so memory stays
+    bounded however large the stream is. Errors raised while the body is
+    read become 503 or 500 responses like errors raised by the handler.
+    """
+    response = await coro
+    if not response.get("isStreaming"):
+        return response
+
+    chunks, size, parts = response["body"], 0, []
+    try:
+        async for chunk in chunks:
+            size += len(chunk.encode("utf-8"))
+            if max_bytes is not None and size > max_bytes:
+                return error_response(
+                    413, "Response too large", f"The body exceeds {max_bytes} bytes; use a host that can stream it"
+                )
+            parts.append(chunk)
+    except DatabaseUnavailableError as e:
+        return service_unavailable_response(e.retry_after, str(e))
+    except Exception as e:
+        return error_response(500, "Internal server error", str(e))
+    finally:
+        await chunks.aclose()
+
+    response["body"] = "".join(parts)
+    del response["isStreaming"]
+    return response
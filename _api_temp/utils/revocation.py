@@ -0,0 +1,73 @@
+"""Token revocation list for serverless functions"""
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from .database import max_time_ms
+from .indexes import ensure_indexes
+from .resilience import resilient_read, resilient_write
+
+REVOCATION_REFRESH_SECONDS = 5.0
+
+# Overlap between incremental syncs so revocations written with a skewed clock are not missed
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=5)
+
+class RevocationList:
+    """In-memory map of revoked token IDs, synced incrementally from revoked_tokens"""
+
+    def __init__(self, refresh_interval: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._synced_until: Optional[datetime] = None
+        self._next_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        """O(1) check against the local copy, no database round trip"""
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        self._revoked[jti] = expires_at
+
+    async def refresh(self, db, force: bool = False) -> None:
+        """Pull revocations newer than the last sync, at most once per interval"""
+        if db is None or (not force and time.monotonic() < self._next_refresh):
+            return
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        
+        now = datetime.utcnow()
+        query = {"expires_at": {"$gt": now}}
+        if self._synced_until is not None:
+            query["revoked_at"] = {"$gte": self._synced_until - REVOCATION_SYNC_OVERLAP}
+        
+        async def fetch():
+            await ensure_indexes(db, "revoked_tokens")
+            return await db.revoked_tokens.find(query, {"expires_at": 1}).max_time_ms(max_time_ms("auth")).to_list(None)
+        
+        revoked_tokens = await resilient_read(fetch, "auth")
+        for revoked in revoked_tokens:
+            self._revoked[revoked["_id"]] = revoked["expires_at"]
+        self._synced_until = now
+        
+        # Expired tokens are rejected by the JWT check anyway
+        self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+
+# Global revocation list shared by handlers in this process
+revocation_list = RevocationList()
+
+async def revoke_token(db, jti: str, expires_at: datetime) -> None:
+    """Persist a revoked token ID until the token would have expired"""
+    # Without MongoDB the revocation only applies to this process
+    if db is not None:
+        async def persist():
+            await ensure_indexes(db, "revoked_tokens")
+            await db.revoked_tokens.update_one(
+                {"_id": jti},
+                {"$setOnInsert": {"expires_at": expires_at, "revoked_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+        await resilient_write(persist)
+    revocation_list.add(jti, expires_at)
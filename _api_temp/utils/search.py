@@ -0,0 +1,86 @@
+"""Search terms for user story search
+
+Each saved story stores the normalized terms of its own text (not the
+"As a [user type], I want to ... so that [benefit]" template around it),
+and queries are normalized the same way. Matching a document and matching
+a story inside it then compare the same terms, which $text (stemmed) and
+a substring regex could not.
+
+Backfill stories saved before search terms existed with:
+
+    python -m _api_temp.utils.search
+"""
+import asyncio
+import json
+import re
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Common English words that carry no meaning for search
+STOP_WORDS = frozenset("""
+a about after all also am an and any are as at be been being but by can could did do does doing
+for from had has have having he her here him his how i if in into is it its just me more most my
+no not of on once only or other our out over own she should so some such than that the their
+them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your
+""".split())
+
+# Stop stripping once a stem would be shorter than this
+MIN_STEM_LENGTH = 3
+
+def stem(word: str) -> str:
+    """Strip common English inflections (-s, -es, -ies, then -ed, -ing)"""
+    if word.endswith("ies") and len(word) > MIN_STEM_LENGTH + 2:
+        word = word[:-3] + "y"
+    elif word.endswith(("sses", "shes", "ches", "xes", "zes")) and len(word) > MIN_STEM_LENGTH + 2:
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > MIN_STEM_LENGTH:
+        word = word[:-1]
+
+    for suffix in ("ing", "ed"):
+        base = word[:-len(suffix)]
+        if word.endswith(suffix) and len(base) >= MIN_STEM_LENGTH:
+            # Undouble the final consonant: logging -> logg -> log
+            if len(base) > MIN_STEM_LENGTH and base[-1] == base[-2] and base[-1] not in "aeiouls":
+                base = base[:-1]
+            return base
+    return word
+
+def search_terms(text: str) -> List[str]:
+    """Distinct stemmed, non-stop-word terms of a text, in first-seen order"""
+    terms: Dict[str, None] = {}
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word not in STOP_WORDS:
+            terms[stem(word)] = None
+    return list(terms)
+
+async def backfill_search_terms(db) -> Dict[str, Any]:
+    """Add search terms to stories saved without them and drop the old text index"""
+    updates = []
+    query = {"stories.0": {"$exists": True}, "stories.search_terms": {"$exists": False}}
+    async for document in db.user_stories.find(query, {"stories": 1}):
+        updates.append(UpdateOne(
+            {"_id": document["_id"]},
+            {"$set": {f"stories.{index}.search_terms": search_terms(story["story"])
+                      for index, story in enumerate(document["stories"])}}
+        ))
+
+    if updates:
+        await db.user_stories.bulk_write(updates, ordered=False)
+
+    # Search no longer uses $text; the index only slowed down inserts
+    index_names = await db.user_stories.index_information()
+    if "user_story_text" in index_names:
+        await db.user_stories.drop_index("user_story_text")
+    return {"updated": len(updates)}
+
+async def _backfill_from_environment() -> Dict[str, Any]:
+    from .database import get_database
+    db = await get_database("admin")
+    return await backfill_search_terms(db)
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(_backfill_from_environment())))
@@ -0,0 +1,500 @@
+"""Storage backends for serverless functions
+
+Handlers read and write users, progress, RICE calculations and user
+stories through a StorageBackend instead of calling Motor directly:
+
+- MongoStorage: MongoDB via Motor (default)
+- MemoryStorage: process-local dicts, for tests and benchmarks
+- SQLiteStorage: a single SQLite file, for small single-node deployments
+
+Select one with STORAGE_BACKEND=mongo|memory|sqlite (SQLITE_PATH sets the
+database file). Features built on MongoDB-specific collections and
+aggregations (analytics, activity events, idempotency, search, export)
+use `storage.db`, which is None outside MongoStorage; they are skipped
+or unavailable on the other backends.
+"""
+import asyncio
+import copy
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from .database import get_database, max_time_ms, with_profile
+from .indexes import ensure_indexes
+from .resilience import resilient_read, resilient_write
+from .write_queue import write_queue
+
+class StorageBackend(ABC):
+    """Operations the handlers perform on the core collections"""
+
+    # Motor database for MongoDB-only features; None on other backends
+    db = None
+
+    def database(self, profile: str):
+        """`db` configured for a named profile in database.py (None outside MongoDB)"""
+        return None
+
+    # Users
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """User document by email"""
+
+    @abstractmethod
+    async def get_user_by_id(self, user_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """User document by _id"""
+
+    @abstractmethod
+    async def insert_user(self, user: Dict[str, Any]) -> ObjectId:
+        """Insert a user document (with _id); email must be unique"""
+
+    @abstractmethod
+    async def update_user(self, user_id: ObjectId, fields: Dict[str, Any], background: bool = False) -> None:
+        """$set fields on a user; background writes may be deferred"""
+
+    @abstractmethod
+    async def find_existing_emails(self, emails: List[str]) -> Set[str]:
+        """Which of these emails are already registered, in one query"""
+
+    @abstractmethod
+    async def insert_users(self, users: List[Dict[str, Any]]) -> Dict[int, str]:
+        """Insert user documents in one batch; returns {index: error} for rejected ones"""
+
+    # Progress
+    @abstractmethod
+    async def get_progress(self, user_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Progress document for a user"""
+
+    @abstractmethod
+    async def insert_progress(self, progress: Dict[str, Any]) -> None:
+        """Insert a progress document (with _id and user_id)"""
+
+    @abstractmethod
+    async def insert_progress_many(self, progress: List[Dict[str, Any]]) -> None:
+        """Insert progress documents in one batch"""
+
+    @abstractmethod
+    async def update_progress(
+        self,
+        user_id: ObjectId,
+        fields: Dict[str, Any],
+        push_assessments: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """$set fields and append assessment scores in one write"""
+
+    # Tools
+    @abstractmethod
+    async def insert_rice_calculation(self, calculation: Dict[str, Any]) -> ObjectId:
+        """Insert a RICE calculation (with _id)"""
+
+    @abstractmethod
+    async def list_rice_calculations(self, user_id: ObjectId, limit: int) -> List[Dict[str, Any]]:
+        """Newest RICE calculations for a user"""
+
+    @abstractmethod
+    async def insert_user_stories(self, record: Dict[str, Any]) -> ObjectId:
+        """Insert a user story record (with _id)"""
+
+    @abstractmethod
+    async def list_user_stories(self, user_id: ObjectId, limit: int) -> List[Dict[str, Any]]:
+        """Newest user story records for a user"""
+
+class DuplicateEmailError(Exception):
+    """Raised by insert_user when the email is already registered"""
+
+class MongoStorage(StorageBackend):
+    """MongoDB via Motor, using the per-operation profiles in database.py
+
+    Every call runs under its profile's deadline and the circuit breaker in
+    resilience.py; reads are also retried (and optionally hedged).
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def database(self, profile):
+        return with_profile(self.db, profile)
+
+    async def get_user_by_email(self, email):
+        users = self.database("auth").users
+        return await resilient_read(
+            lambda: users.find_one({"email": email}, max_time_ms=max_time_ms("auth")), "auth"
+        )
+
+    async def get_user_by_id(self, user_id):
+        users = self.database("auth").users
+        return await resilient_read(
+            lambda: users.find_one({"_id": user_id}, max_time_ms=max_time_ms("auth")), "auth"
+        )
+
+    async def insert_user(self, user):
+        async def insert():
+            await ensure_indexes(self.db, "users")
+            return await self.db.users.insert_one(user)
+
+        try:
+            result = await resilient_write(insert)
+        except DuplicateKeyError as e:
+            raise DuplicateEmailError(user["email"]) from e
+        return result.inserted_id
+
+    async def update_user(self, user_id, fields, background=False):
+        if background:
+            write_queue.enqueue(self.database("background"), "users", user_id, fields)
+        else:
+            await resilient_write(lambda: self.db.users.update_one({"_id": user_id}, {"$set": fields}))
+
+    async def find_existing_emails(self, emails):
+        users = await resilient_read(
+            lambda: self.db.users.find(
+                {"email": {"$in": emails}}, {"_id": 0, "email": 1}
+            ).max_time_ms(max_time_ms("primary")).to_list(None)
+        )
+        return {user["email"] for user in users}
+
+    async def insert_users(self, users):
+        async def insert():
+            await ensure_indexes(self.db, "users")
+            return await self.db.users.insert_many(users, ordered=False)
+
+        try:
+            await resilient_write(insert)
+        except BulkWriteError as e:
+            return {
+                error["index"]: "Email already registered" if error["code"] == 11000 else error["errmsg"]
+                for error in e.details["writeErrors"]
+            }
+        return {}
+
+    async def get_progress(self, user_id):
+        return await resilient_read(
+            lambda: self.db.user_progress.find_one({"user_id": user_id}, max_time_ms=max_time_ms("primary"))
+        )
+
+    async def insert_progress(self, progress):
+        await resilient_write(lambda: self.db.user_progress.insert_one(progress))
+
+    async def insert_progress_many(self, progress):
+        await resilient_write(lambda: self.db.user_progress.insert_many(progress, ordered=False))
+
+    async def update_progress(self, user_id, fields, push_assessments=None):
+        update = {"$set": fields}
+        if push_assessments:
+            update["$push"] = {"assessment_scores": {"$each": push_assessments}}
+        await resilient_write(lambda: self.db.user_progress.update_one({"user_id": user_id}, update))
+
+    async def insert_rice_calculation(self, calculation):
+        result = await resilient_write(lambda: self.db.rice_calculations.insert_one(calculation))
+        return result.inserted_id
+
+    async def list_rice_calculations(self, user_id, limit):
+        return await self._list_history("rice_calculations", user_id, limit)
+
+    async def insert_user_stories(self, record):
+        result = await resilient_write(lambda: self.db.user_stories.insert_one(record))
+        return result.inserted_id
+
+    async def list_user_stories(self, user_id, limit):
+        return await self._list_history("user_stories", user_id, limit)
+
+    async def _list_history(self, collection, user_id, limit):
+        """Newest documents owned by a user, read under the history profile"""
+        documents = self.database("history")[collection]
+        return await resilient_read(
+            lambda: documents.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+            .max_time_ms(max_time_ms("history")).to_list(limit),
+            "history"
+        )
+
+class MemoryStorage(StorageBackend):
+    """Process-local storage; documents are copied in and out like a real database"""
+
+    def __init__(self):
+        self.users: Dict[ObjectId, Dict[str, Any]] = {}
+        self.user_progress: Dict[ObjectId, Dict[str, Any]] = {}
+        self.rice_calculations: List[Dict[str, Any]] = []
+        self.user_stories: List[Dict[str, Any]] = []
+
+    async def get_user_by_email(self, email):
+        for user in self.users.values():
+            if user["email"] == email:
+                return copy.deepcopy(user)
+        return None
+
+    async def get_user_by_id(self, user_id):
+        return copy.deepcopy(self.users.get(user_id))
+
+    async def insert_user(self, user):
+        if any(existing["email"] == user["email"] for existing in self.users.values()):
+            raise DuplicateEmailError(user["email"])
+        self.users[user["_id"]] = copy.deepcopy(user)
+        return user["_id"]
+
+    async def update_user(self, user_id, fields, background=False):
+        if user_id in self.users:
+            self.users[user_id].update(copy.deepcopy(fields))
+
+    async def find_existing_emails(self, emails):
+        wanted = set(emails)
+        return {user["email"] for user in self.users.values() if user["email"] in wanted}
+
+    async def insert_users(self, users):
+        errors = {}
+        for index, user in enumerate(users):
+            try:
+                await self.insert_user(user)
+            except DuplicateEmailError:
+                errors[index] = "Email already registered"
+        return errors
+
+    async def get_progress(self, user_id):
+        return copy.deepcopy(self.user_progress.get(user_id))
+
+    async def insert_progress(self, progress):
+        self.user_progress[progress["user_id"]] = copy.deepcopy(progress)
+
+    async def insert_progress_many(self, progress):
+        for document in progress:
+            await self.insert_progress(document)
+
+    async def update_progress(self, user_id, fields, push_assessments=None):
+        progress = self.user_progress.get(user_id)
+        if progress is None:
+            return
+        progress.update(copy.deepcopy(fields))
+        if push_assessments:
+            progress.setdefault("assessment_scores", []).extend(copy.deepcopy(push_assessments))
+
+    async def insert_rice_calculation(self, calculation):
+        self.rice_calculations.append(copy.deepcopy(calculation))
+        return calculation["_id"]
+
+    async def list_rice_calculations(self, user_id, limit):
+        return self._newest(self.rice_calculations, user_id, limit)
+
+    async def insert_user_stories(self, record):
+        self.user_stories.append(copy.deepcopy(record))
+        return record["_id"]
+
+    async def list_user_stories(self, user_id, limit):
+        return self._newest(self.user_stories, user_id, limit)
+
+    @staticmethod
+    def _newest(documents, user_id, limit):
+        matching = [document for document in documents if document["user_id"] == user_id]
+        matching.sort(key=lambda document: document["created_at"], reverse=True)
+        return copy.deepcopy(matching[:limit])
+
+# Round-trips ObjectId and naive UTC datetimes through JSON
+_JSON_OPTIONS = json_util.JSONOptions(json_mode=json_util.JSONMode.RELAXED, tz_aware=False)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, email TEXT UNIQUE NOT NULL, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS user_progress (user_id TEXT PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rice_calculations (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, created_at TEXT NOT NULL, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS rice_calculations_user_created ON rice_calculations (user_id, created_at);
+CREATE TABLE IF NOT EXISTS user_stories (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, created_at TEXT NOT NULL, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS user_stories_user_created ON user_stories (user_id, created_at);
+"""
+
+# Host parameters per statement (older SQLite builds allow 999)
+SQLITE_MAX_PARAMETERS = 900
+
+class SQLiteStorage(StorageBackend):
+    """Single-file SQLite storage; documents are stored as Extended JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SQLITE_SCHEMA)
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    async def _execute(self, sql: str, params=(), fetch: bool = False):
+        """Run a statement in a worker thread, one at a time"""
+        def run():
+            with self._lock:
+                try:
+                    cursor = self._connection.execute(sql, params)
+                    rows = cursor.fetchall() if fetch else None
+                    self._connection.commit()
+                except BaseException:
+                    # Leave no transaction open for the next statement (or BEGIN IMMEDIATE)
+                    self._connection.rollback()
+                    raise
+                return rows
+
+        return await asyncio.to_thread(run)
+
+    @staticmethod
+    def _dump(document) -> str:
+        return json_util.dumps(document, json_options=_JSON_OPTIONS)
+
+    @staticmethod
+    def _load(row) -> Optional[Dict[str, Any]]:
+        return json_util.loads(row[0], json_options=_JSON_OPTIONS) if row else None
+
+    async def _fetch_one(self, sql, params):
+        rows = await self._execute(sql, params, fetch=True)
+        return self._load(rows[0]) if rows else None
+
+    async def _modify(self, table: str, key_column: str, key: str, apply) -> None:
+        """Read, change and write back one document in a single transaction
+
+        BEGIN IMMEDIATE takes the write lock before the read, so concurrent
+        updates (from this or another process) cannot overwrite each other.
+        """
+        def run():
+            with self._lock:
+                self._connection.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._connection.execute(f"SELECT doc FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+                    if row is not None:
+                        document = self._load(row)
+                        apply(document)
+                        self._connection.execute(
+                            f"UPDATE {table} SET doc = ? WHERE {key_column} = ?", (self._dump(document), key)
+                        )
+                    self._connection.commit()
+                except BaseException:
+                    self._connection.rollback()
+                    raise
+
+        await asyncio.to_thread(run)
+
+    async def _fetch_all(self, sql, params):
+        rows = await self._execute(sql, params, fetch=True)
+        return [self._load(row) for row in rows]
+
+    async def get_user_by_email(self, email):
+        return await self._fetch_one("SELECT doc FROM users WHERE email = ?", (email,))
+
+    async def get_user_by_id(self, user_id):
+        return await self._fetch_one("SELECT doc FROM users WHERE id = ?", (str(user_id),))
+
+    async def insert_user(self, user):
+        try:
+            await self._execute(
+                "INSERT INTO users (id, email, doc) VALUES (?, ?, ?)",
+                (str(user["_id"]), user["email"], self._dump(user))
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateEmailError(user["email"]) from e
+        return user["_id"]
+
+    async def update_user(self, user_id, fields, background=False):
+        await self._modify("users", "id", str(user_id), lambda user: user.update(fields))
+
+    async def find_existing_emails(self, emails):
+        existing = set()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(emails), SQLITE_MAX_PARAMETERS):
+            chunk = emails[start:start + SQLITE_MAX_PARAMETERS]
+            rows = await self._execute(
+                f"SELECT email FROM users WHERE email IN ({', '.join('?' * len(chunk))})", chunk, fetch=True
+            )
+            existing.update(row[0] for row in rows)
+        return existing
+
+    async def insert_users(self, users):
+        rows = [(str(user["_id"]), user["email"], self._dump(user)) for user in users]
+
+        def run():
+            errors = {}
+            with self._lock:
+                # One transaction for the whole batch
+                try:
+                    for index, row in enumerate(rows):
+                        try:
+                            self._connection.execute("INSERT INTO users (id, email, doc) VALUES (?, ?, ?)", row)
+                        except sqlite3.IntegrityError:
+                            errors[index] = "Email already registered"
+                    self._connection.commit()
+                except BaseException:
+                    self._connection.rollback()
+                    raise
+            return errors
+
+        return await asyncio.to_thread(run)
+
+    async def get_progress(self, user_id):
+        return await self._fetch_one("SELECT doc FROM user_progress WHERE user_id = ?", (str(user_id),))
+
+    async def insert_progress(self, progress):
+        await self._execute(
+            "INSERT INTO user_progress (user_id, doc) VALUES (?, ?)",
+            (str(progress["user_id"]), self._dump(progress))
+        )
+
+    async def insert_progress_many(self, progress):
+        rows = [(str(document["user_id"]), self._dump(document)) for document in progress]
+
+        def run():
+            with self._lock:
+                try:
+                    self._connection.executemany("INSERT INTO user_progress (user_id, doc) VALUES (?, ?)", rows)
+                    self._connection.commit()
+                except BaseException:
+                    self._connection.rollback()
+                    raise
+
+        await asyncio.to_thread(run)
+
+    async def update_progress(self, user_id, fields, push_assessments=None):
+        def apply(progress):
+            progress.update(fields)
+            if push_assessments:
+                progress.setdefault("assessment_scores", []).extend(push_assessments)
+
+        await self._modify("user_progress", "user_id", str(user_id), apply)
+
+    async def _insert_owned(self, table, document):
+        await self._execute(
+            f"INSERT INTO {table} (id, user_id, created_at, doc) VALUES (?, ?, ?, ?)",
+            (str(document["_id"]), str(document["user_id"]), document["created_at"].isoformat(), self._dump(document))
+        )
+        return document["_id"]
+
+    async def _list_owned(self, table, user_id, limit):
+        return await self._fetch_all(
+            f"SELECT doc FROM {table} WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+            (str(user_id), limit)
+        )
+
+    async def insert_rice_calculation(self, calculation):
+        return await self._insert_owned("rice_calculations", calculation)
+
+    async def list_rice_calculations(self, user_id, limit):
+        return await self._list_owned("rice_calculations", user_id, limit)
+
+    async def insert_user_stories(self, record):
+        return await self._insert_owned("user_stories", record)
+
+    async def list_user_stories(self, user_id, limit):
+        return await self._list_owned("user_stories", user_id, limit)
+
+# Backend shared by handlers in this process
+_storage: Optional[StorageBackend] = None
+
+async def get_storage() -> StorageBackend:
+    """Get the configured storage backend"""
+    global _storage
+
+    backend = os.environ.get("STORAGE_BACKEND", "mongo")
+    if backend == "mongo":
+        # The Motor client is pooled by get_database, so no caching is needed here
+        return MongoStorage(await get_database())
+
+    if _storage is None:
+        if backend == "memory":
+            _storage = MemoryStorage()
+        elif backend == "sqlite":
+            _storage = SQLiteStorage(os.environ.get("SQLITE_PATH", "pm_guide.sqlite3"))
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    return _storage
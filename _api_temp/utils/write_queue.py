@@ -0,0 +1,215 @@
+"""Write-behind queue for non-critical updates"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .resilience import resilient_write
+from .response import buffer_streaming_response
+
+FLUSH_INTERVAL_SECONDS = 1.0
+FLUSH_SIZE_THRESHOLD = 100
+MAX_PENDING_WRITES = 10000
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Coalesce $set updates per document and flush them with bulk_write"""
+
+    def __init__(
+        self,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        flush_size: int = FLUSH_SIZE_THRESHOLD,
+        max_pending: int = MAX_PENDING_WRITES
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._db = None
+        self._pending: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes = set()
+        self._metrics = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+    def enqueue(self, db, collection: str, document_id: Any, fields: Dict[str, Any]) -> bool:
+        """Queue a $set for a document; later fields win over earlier ones"""
+        key = (collection, document_id)
+        if key not in self._pending and len(self._pending) >= self.max_pending:
+            self._metrics["dropped"] += 1
+            return False
+
+        self._db = db
+        self._metrics["enqueued"] += 1
+        if key in self._pending:
+            self._metrics["coalesced"] += 1
+            self._pending[key].update(fields)
+        else:
+            self._pending[key] = dict(fields)
+
+        if len(self._pending) >= self.flush_size:
+            self._start_flush()
+        elif self._timer is None or self._timer.done() or self._timer.get_loop() is not asyncio.get_running_loop():
+            self._timer = asyncio.create_task(self._flush_later())
+        return True
+
+    def _start_flush(self) -> None:
+        """Flush in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending updates, one bulk_write per collection"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        operations: Dict[str, list] = {}
+        for (collection, document_id), fields in pending.items():
+            operations.setdefault(collection, []).append(
+                UpdateOne({"_id": document_id}, {"$set": fields})
+            )
+
+        started = time.perf_counter()
+        written = 0
+        for collection, ops in operations.items():
+            try:
+                await resilient_write(lambda: self._db[collection].bulk_write(ops, ordered=False), "background")
+                written += len(ops)
+            except Exception:
+                self._metrics["dropped"] += len(ops)
+                logger.warning("Dropped %d queued writes to %s", len(ops), collection, exc_info=True)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._metrics["flushes"] += 1
+        self._metrics["flushed"] += written
+        self._metrics["last_flush_ms"] = elapsed_ms
+        self._metrics["total_flush_ms"] += elapsed_ms
+        return written
+
+    async def drain(self) -> None:
+        """Flush everything before shutdown or before the event loop closes"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, flush latency and dropped write counters"""
+        flushes = self._metrics["flushes"]
+        return {
+            **self._metrics,
+            "depth": len(self._pending),
+            "avg_flush_ms": self._metrics["total_flush_ms"] / flushes if flushes else 0.0
+        }
+
+# Global queue shared by handlers in this process
+write_queue = WriteBehindQueue()
+
+# Buffers drained by run_and_drain (anything with an async drain())
+_drainables = [write_queue]
+
+def register_drainable(buffer) -> None:
+    """Have run_and_drain flush another in-process buffer"""
+    _drainables.append(buffer)
+
+async def run_and_drain(coro):
+    """Run a handler, then flush queued writes before asyncio.run closes the loop"""
+    try:
+        return await coro
+    finally:
+        await drain_all()
+
+async def drain_all() -> None:
+    """Flush every registered buffer"""
+    for buffer in _drainables:
+        await buffer.drain()
+
+def get_metrics() -> Dict[str, Any]:
+    """Counters of every registered buffer, keyed by class name"""
+    return {type(buffer).__name__: buffer.get_metrics() for buffer in _drainables}
+
+# Long-lived event loop used when DEPLOYMENT_MODE=server
+_server_loop: Optional[asyncio.AbstractEventLoop] = None
+_server_loop_lock = threading.Lock()
+
+def _drain_server_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.run_coroutine_threadsafe(drain_all(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+def get_server_loop() -> asyncio.AbstractEventLoop:
+    """Event loop that outlives individual requests, running on its own thread"""
+    global _server_loop
+
+    with _server_loop_lock:
+        if _server_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="handler-loop", daemon=True).start()
+            atexit.register(_drain_server_loop, loop)
+            _server_loop = loop
+    return _server_loop
+
+def is_server_mode() -> bool:
+    return os.environ.get("DEPLOYMENT_MODE", "serverless") == "server"
+
+def run_handler(coro):
+    """Entry point for every handler's main()
+
+    A serverless function can be frozen as soon as it returns, and the
+    Python runtime has no post-response hook, so queued writes are flushed
+    before the response goes out. Serverless mode therefore gives no
+    latency win: the writes coalesce into one bulk_write per buffer, but the
+    caller still waits for it. With DEPLOYMENT_MODE=server every request
+    runs on one long-lived loop and returns as soon as the handler does;
+    the buffers flush on their own interval and are drained when the
+    process exits.
+    """
+    if is_server_mode():
+        return asyncio.run_coroutine_threadsafe(coro, get_server_loop()).result()
+    return asyncio.run(run_and_drain(coro))
+
+def _iterate_on_server_loop(chunks) -> Iterator[str]:
+    """Plain iterator over an async one, reading each chunk on the server loop"""
+    loop = get_server_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(chunks.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(chunks.aclose(), loop).result()
+
+def run_streaming_handler(coro, max_buffered_bytes: Optional[int] = None):
+    """Entry point for handlers that return streaming_response()
+
+    With DEPLOYMENT_MODE=server the host receives the body as an iterator
+    that reads the next chunk only when asked, so nothing is buffered. A
+    serverless function cannot stream, so there the body is joined, and
+    it answers 413 beyond max_buffered_bytes.
+    """
+    if is_server_mode():
+        response = run_handler(coro)
+        if response.get("isStreaming"):
+            response["body"] = _iterate_on_server_loop(response["body"])
+        return response
+    return run_handler(buffer_streaming_response(coro, max_buffered_bytes))
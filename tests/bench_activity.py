@@ -0,0 +1,92 @@
+"""Benchmark of ActivityBuffer.emit and flush at a sustained event rate
+
+Emits events for many users at a fixed rate against a stubbed bulk_write
+that sleeps like a database round trip, then reports the emit cost, flush
+latency and any dropped events. Run with:
+
+    python -m tests.bench_activity [events_per_second] [seconds] [round_trip_ms]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from _api_temp.utils.activity import ActivityBuffer, SECTION_TOGGLED
+
+TICK_SECONDS = 0.01
+USERS = 1000
+
+class StubCollection:
+    def __init__(self, round_trip):
+        self.round_trip = round_trip
+        self.bulk_writes = 0
+        self.operations = 0
+
+    async def create_indexes(self, models):
+        pass
+
+    async def bulk_write(self, operations, ordered=True):
+        await asyncio.sleep(self.round_trip)
+        self.bulk_writes += 1
+        self.operations += len(operations)
+
+class StubDatabase:
+    def __init__(self, round_trip):
+        self.activity_events = StubCollection(round_trip)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+async def run(events_per_second, seconds, round_trip):
+    db = StubDatabase(round_trip)
+    buffer = ActivityBuffer()
+    flush_ms = []
+    flush = buffer.flush
+
+    async def timed_flush():
+        started = time.perf_counter()
+        written = await flush()
+        if written:
+            flush_ms.append((time.perf_counter() - started) * 1000)
+        return written
+
+    buffer.flush = timed_flush
+    per_tick = int(events_per_second * TICK_SECONDS)
+    emit_seconds = 0.0
+    emitted = 0
+    started = time.perf_counter()
+    for tick in range(int(seconds / TICK_SECONDS)):
+        emit_started = time.perf_counter()
+        for _ in range(per_tick):
+            buffer.emit(db, f"user-{emitted % USERS}", SECTION_TOGGLED, {"section_id": "s1"})
+            emitted += 1
+        emit_seconds += time.perf_counter() - emit_started
+        # Sleep until the next tick so the rate is held, not just burst
+        await asyncio.sleep(max(0.0, started + (tick + 1) * TICK_SECONDS - time.perf_counter()))
+    elapsed = time.perf_counter() - started
+    await buffer.drain()
+
+    metrics = buffer.get_metrics()
+    return {
+        "events": emitted,
+        "events_per_second": round(emitted / elapsed),
+        "emit_us": round(emit_seconds / emitted * 1e6, 2),
+        "flushes": metrics["flushes"],
+        "bulk_writes": db.activity_events.bulk_writes,
+        "bucket_upserts": db.activity_events.operations,
+        "flush_ms_p50": round(statistics.median(flush_ms), 1),
+        "flush_ms_max": round(max(flush_ms), 1),
+        "flushed": metrics["flushed"],
+        "dropped": metrics["dropped"]
+    }
+
+def main():
+    events_per_second = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    round_trip_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    results = asyncio.run(run(events_per_second, seconds, round_trip_ms / 1000))
+    for name, value in results.items():
+        print(f"{name:<20}{value:>12}")
+
+if __name__ == "__main__":
+    main()
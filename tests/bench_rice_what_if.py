@@ -0,0 +1,60 @@
+"""Time and memory of the RICE what-if analysis at the largest allowed size
+
+Builds features with uniform and triangular ranges, runs analyze() in
+this process, and reports wall time and the peak RSS added by the run.
+Run one size per process, since peak RSS never goes down:
+
+    python -m tests.bench_rice_what_if [features] [samples|grid_steps] [monte_carlo|grid]
+"""
+import importlib
+import resource
+import sys
+import time
+
+from _api_temp.utils.models import RiceWhatIfRequest
+
+what_if = importlib.import_module("_api_temp.tools.rice-what-if")
+
+def features(count):
+    return [
+        {
+            "feature_name": f"feature-{i}",
+            "reach": {"min": 100 + i, "max": 1000 + 10 * i},
+            "impact": {"min": 0.5, "max": 3, "mode": 1 + i % 2, "distribution": "triangular"},
+            "confidence": {"min": 50, "max": 100},
+            "effort": {"min": 1, "max": 1 + i % 8} if i % 3 else 2
+        }
+        for i in range(count)
+    ]
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    method = sys.argv[3] if len(sys.argv) > 3 else "monte_carlo"
+    if method == "grid":
+        size = {"grid_steps": int(sys.argv[2]) if len(sys.argv) > 2 else 10}
+    else:
+        size = {"samples": int(sys.argv[2]) if len(sys.argv) > 2 else 10000}
+    request = RiceWhatIfRequest(features=features(count), method=method, seed=1, **size)
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    result = what_if.analyze(request)
+    elapsed = time.perf_counter() - started
+
+    results = {
+        "method": method,
+        "features": count,
+        "scenarios": result["scenarios"],
+        "cells": count * result["scenarios"],
+        "seconds": round(elapsed, 2),
+        "peak_rss_added_mb": round(peak_rss_mb() - baseline, 1)
+    }
+    for name, value in results.items():
+        print(f"{name:<20}{value:>12}")
+
+if __name__ == "__main__":
+    main()
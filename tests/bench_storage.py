@@ -0,0 +1,97 @@
+"""Throughput of the hot StorageBackend calls on each backend
+
+Times the calls an authenticated progress write makes (user lookup,
+progress read, progress update) plus history listing, sequentially and
+with concurrent callers. MongoDB is included when MONGO_URL is reachable
+(a throwaway database is created and dropped). Run with:
+
+    python -m tests.bench_storage [operations] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+
+from _api_temp.utils.onboarding import new_progress_document
+from _api_temp.utils.storage import MemoryStorage, MongoStorage, SQLiteStorage
+from tests.test_storage_backends import mongo_available, new_user, owned
+
+USERS = 100
+
+async def seed(storage):
+    users = [new_user(f"bench-{i}@example.com") for i in range(USERS)]
+    now = datetime.utcnow()
+    await storage.insert_users(users)
+    await storage.insert_progress_many([new_progress_document(user["_id"], now) for user in users])
+    for i, user in enumerate(users):
+        await storage.insert_rice_calculation(owned(user["_id"], now - timedelta(minutes=i), feature_name="f", score=1.0))
+    return [user["_id"] for user in users]
+
+async def ops_per_second(operation, operations, concurrency):
+    """Run operation(i) `operations` times with `concurrency` callers in flight"""
+    counter = iter(range(operations))
+
+    async def caller():
+        for i in counter:
+            await operation(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[caller() for _ in range(concurrency)])
+    return operations / (time.perf_counter() - started)
+
+async def bench(storage, operations, concurrency):
+    user_ids = await seed(storage)
+    now = datetime.utcnow()
+    cases = {
+        "get_user_by_id": lambda i: storage.get_user_by_id(user_ids[i % USERS]),
+        "get_progress": lambda i: storage.get_progress(user_ids[i % USERS]),
+        "update_progress": lambda i: storage.update_progress(
+            user_ids[i % USERS], {"updated_at": now},
+            push_assessments=[{"assessment_id": "quiz", "score": 1, "answers": {}, "completed_at": now}]
+        ),
+        "list_rice_calculations": lambda i: storage.list_rice_calculations(user_ids[i % USERS], 20)
+    }
+    results = {}
+    for name, operation in cases.items():
+        results[name] = (
+            await ops_per_second(operation, operations, 1),
+            await ops_per_second(operation, operations, concurrency)
+        )
+    return results
+
+async def run_backend(name, operations, concurrency):
+    if name == "memory":
+        return await bench(MemoryStorage(), operations, concurrency)
+    if name == "sqlite":
+        with tempfile.TemporaryDirectory() as directory:
+            return await bench(SQLiteStorage(os.path.join(directory, "bench.sqlite3")), operations, concurrency)
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[f"storage_bench_{uuid.uuid4().hex[:12]}"]
+    try:
+        await db.users.create_index("email", unique=True)
+        await db.user_progress.create_index("user_id", unique=True)
+        return await bench(MongoStorage(db), operations, concurrency)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    backends = ["memory", "sqlite"] + (["mongo"] if mongo_available() else [])
+
+    print(f"{'backend':<10}{'operation':<26}{'ops/s x1':>12}{f'ops/s x{concurrency}':>14}")
+    for name in backends:
+        for operation, (sequential, concurrent) in asyncio.run(run_backend(name, operations, concurrency)).items():
+            print(f"{name:<10}{operation:<26}{sequential:>12.0f}{concurrent:>14.0f}")
+    if "mongo" not in backends:
+        print("mongo skipped: MONGO_URL is not set or the server is unreachable")
+
+if __name__ == "__main__":
+    main()
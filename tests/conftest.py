@@ -0,0 +1,57 @@
+"""Shared fixtures: every test gets a fresh in-memory storage backend"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from _api_temp.utils import storage as storage_module
+from _api_temp.utils.auth import create_access_token
+from _api_temp.utils.onboarding import new_progress_document
+
+@pytest.fixture
+def memory_storage(monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    monkeypatch.setattr(storage_module, "_storage", None)
+    return asyncio.run(storage_module.get_storage())
+
+@pytest.fixture
+def learner(memory_storage):
+    """A learner with empty progress and a bearer token (no bcrypt involved)"""
+    now = datetime.utcnow()
+    user = {
+        "_id": ObjectId(),
+        "email": "learner@example.com",
+        "password": "not-a-real-hash",
+        "name": "Learner",
+        "role": "learner",
+        "created_at": now,
+        "updated_at": now,
+        "last_login": None
+    }
+
+    async def create():
+        await memory_storage.insert_user(user)
+        await memory_storage.insert_progress(new_progress_document(user["_id"], now))
+
+    asyncio.run(create())
+    token = create_access_token({"sub": str(user["_id"])})
+    return user, {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def admin(memory_storage):
+    """An admin user and its bearer token headers"""
+    now = datetime.utcnow()
+    user = {
+        "_id": ObjectId(),
+        "email": "admin@example.com",
+        "password": "not-a-real-hash",
+        "name": "Admin",
+        "role": "admin",
+        "created_at": now,
+        "updated_at": now,
+        "last_login": None
+    }
+    asyncio.run(memory_storage.insert_user(user))
+    token = create_access_token({"sub": str(user["_id"])})
+    return user, {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,115 @@
+import asyncio
+import importlib
+import logging
+from datetime import datetime, timedelta
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+from _api_temp.utils import resilience
+from _api_temp.utils.activity import SECTION_TOGGLED, ActivityBuffer, get_activity_timeline
+
+activity = importlib.import_module("_api_temp.progress.activity")
+
+class FakeBucketCursor:
+    """Buckets newest day first, counting how many were read"""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets, key=lambda bucket: bucket["day"], reverse=True)
+        self.read = 0
+
+    def sort(self, *args):
+        return self
+
+    def max_time_ms(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.read == len(self.buckets):
+            raise StopAsyncIteration
+        self.read += 1
+        return self.buckets[self.read - 1]
+
+    async def close(self):
+        pass
+
+class FakeDatabase:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.activity_events = self
+
+    def find(self, *args):
+        return self.cursor
+
+def day_buckets(days, events_per_day):
+    start = datetime(2026, 1, 1, 12)
+    buckets = []
+    for offset in range(days):
+        at = start + timedelta(days=offset)
+        buckets.append({"day": at.strftime("%Y-%m-%d"), "events": [
+            {"type": "section_toggled", "at": at + timedelta(minutes=minute), "data": {}}
+            for minute in range(events_per_day)
+        ]})
+    return buckets
+
+def test_timeline_stops_reading_once_limit_is_reached():
+    cursor = FakeBucketCursor(day_buckets(365, 20))
+
+    events = asyncio.run(get_activity_timeline(FakeDatabase(cursor), "user-1", "2026-01-01", "2026-12-31", limit=50))
+
+    assert len(events) == 50
+    assert events[0]["at"] == datetime(2026, 12, 31, 12, 19)
+    # Three days hold the newest 50 events; one more bucket is read to know the day is complete
+    assert cursor.read == 4
+
+def test_timeline_reads_every_bucket_of_the_last_day():
+    buckets = day_buckets(3, 5)
+    # A second bucket for the newest day, as when the first one filled up
+    buckets.append({"day": buckets[-1]["day"], "events": [
+        {"type": "rice_computed", "at": datetime(2026, 1, 3, 23), "data": {}}
+    ]})
+
+    events = asyncio.run(get_activity_timeline(FakeDatabase(FakeBucketCursor(buckets)), "user-1", "2026-01-01", "2026-01-03", limit=3))
+
+    assert events[0]["type"] == "rice_computed"
+
+def test_timeline_range_is_capped(learner):
+    _, headers = learner
+    event = {"httpMethod": "GET", "headers": headers,
+             "queryStringParameters": {"from": "2025-01-01", "to": "2026-01-01"}}
+
+    response = asyncio.run(activity.handler(event, None))
+
+    assert response["statusCode"] == 400
+
+class UnreachableActivityDatabase:
+    def __init__(self):
+        self.activity_events = self
+
+    def __getitem__(self, name):
+        return self
+
+    async def create_indexes(self, models):
+        pass
+
+    async def bulk_write(self, operations, ordered=True):
+        raise ServerSelectionTimeoutError("No servers found yet")
+
+def test_failed_flush_is_logged_and_counted(monkeypatch, caplog):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    buffer = ActivityBuffer()
+
+    async def emit_and_drain():
+        db = UnreachableActivityDatabase()
+        for user in ("user-1", "user-1", "user-2"):
+            buffer.emit(db, user, SECTION_TOGGLED)
+        await buffer.drain()
+
+    with caplog.at_level(logging.WARNING, logger="_api_temp.utils.activity"):
+        asyncio.run(emit_and_drain())
+
+    metrics = buffer.get_metrics()
+    assert (metrics["flushed"], metrics["dropped"], metrics["failed_flushes"]) == (0, 3, 1)
+    assert "Dropped 3 activity events" in caplog.text
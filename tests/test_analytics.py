@@ -0,0 +1,131 @@
+import asyncio
+import importlib
+import json
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from _api_temp.utils import analytics, resilience
+from _api_temp.utils.analytics import analytics_recorder
+from _api_temp.utils.onboarding import new_progress_document
+from _api_temp.utils.write_queue import run_and_drain
+from tests.test_storage_backends import mongo_available, new_user
+
+assessment = importlib.import_module("_api_temp.progress.assessment")
+
+class UnreachableCollection:
+    async def _fail(self, *args, **kwargs):
+        raise ServerSelectionTimeoutError("No servers found yet")
+
+    update_one = bulk_write = create_indexes = _fail
+
+class UnreachableDatabase:
+    def __getattr__(self, name):
+        return UnreachableCollection()
+
+    def __getitem__(self, name):
+        return UnreachableCollection()
+
+def test_analytics_failure_does_not_fail_the_write(memory_storage, learner, monkeypatch):
+    user, headers = learner
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    monkeypatch.setattr(memory_storage, "database", lambda profile: UnreachableDatabase())
+    failed = analytics_recorder.get_metrics()["failed"]
+    body = {"assessment_id": "quiz-1", "answers": {}, "score": 80}
+
+    response = asyncio.run(run_and_drain(
+        assessment.handler({"httpMethod": "POST", "headers": headers, "body": json.dumps(body)}, None)
+    ))
+
+    assert response["statusCode"] == 200
+    progress = asyncio.run(memory_storage.get_progress(user["_id"]))
+    assert [a["assessment_id"] for a in progress["assessment_scores"]] == ["quiz-1"]
+    # Both the assessment totals and the daily active count were attempted and logged
+    assert analytics_recorder.get_metrics()["failed"] == failed + 2
+
+class InMemoryCollection:
+    """Just enough of a collection for rebuild_learner_stats over no progress"""
+
+    def __init__(self, documents=()):
+        self.documents = {document["_id"]: document for document in documents}
+
+    async def aggregate(self, pipeline):
+        for document in ():
+            yield document
+
+    async def count_documents(self, query):
+        return sum(all(document.get(k) == v for k, v in query.items()) for document in self.documents.values())
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            document = self.documents.setdefault(operation._filter["_id"], {"_id": operation._filter["_id"]})
+            document.update(operation._doc["$set"])
+
+    async def _find(self, query):
+        for document in self.documents.values():
+            if document["_id"] in query["_id"]["$in"]:
+                yield document
+
+    def find(self, query):
+        return self._find(query)
+
+class InMemoryDatabase:
+    def __init__(self, users):
+        self.users = InMemoryCollection(users)
+        self.user_progress = InMemoryCollection()
+        self.learner_stats = InMemoryCollection()
+
+def test_rebuild_counts_only_learners():
+    db = InMemoryDatabase([
+        {"_id": 1, "role": "learner"}, {"_id": 2, "role": "learner"}, {"_id": 3, "role": "admin"}
+    ])
+
+    stats = asyncio.run(analytics.rebuild_learner_stats(db))
+
+    assert stats["total_learners"] == 2
+
+@pytest.mark.skipif(not mongo_available(), reason="MONGO_URL is not set or the server is unreachable")
+def test_increments_and_rebuild_agree():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def scenario(db):
+        now = datetime.utcnow()
+        learners = [new_user(f"learner-{i}@example.com") for i in range(3)]
+        await db.users.insert_many([*learners, new_user("admin@example.com", role="admin")])
+        for user in learners:
+            await db.user_progress.insert_one(new_progress_document(user["_id"], now))
+            await analytics.record_new_learner(db)
+
+        # One learner finishes a module and takes an assessment
+        before = analytics.snapshot_progress(await db.user_progress.find_one({"user_id": learners[0]["_id"]}))
+        score = {"assessment_id": "quiz-1", "score": 70, "answers": {}, "completed_at": now}
+        await db.user_progress.update_one({"user_id": learners[0]["_id"]}, {
+            "$set": {"module_progress.pm-basics": {"completed": True, "completed_at": now}, "total_progress": 25.0},
+            "$push": {"assessment_scores": score}
+        })
+        after = await db.user_progress.find_one({"user_id": learners[0]["_id"]})
+        await analytics.record_progress_change(db, before, after)
+        await analytics.record_assessments(db, [("quiz-1", 70)])
+
+        incremental = await analytics.get_learner_stats(db)
+        rebuilt = await analytics.rebuild_learner_stats(db)
+        return incremental, rebuilt
+
+    async def with_database():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+        db = client[f"analytics_{uuid.uuid4().hex[:12]}"]
+        try:
+            return await scenario(db)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    incremental, rebuilt = asyncio.run(with_database())
+
+    assert incremental["total_learners"] == rebuilt["total_learners"] == 3
+    assert incremental["module_completions"] == rebuilt["module_completions"]
+    assert incremental["progress_histogram"] == rebuilt["progress_histogram"]
+    assert incremental["assessment_averages"] == rebuilt["assessment_averages"]
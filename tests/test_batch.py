@@ -0,0 +1,94 @@
+import asyncio
+import importlib
+import json
+
+batch = importlib.import_module("_api_temp.batch.index")
+
+def run_batch(headers, requests):
+    event = {"httpMethod": "POST", "headers": headers, "body": json.dumps({"requests": requests})}
+    response = asyncio.run(batch.handler(event, None))
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])["responses"]
+
+def test_writes_in_one_batch_do_not_overwrite_each_other(memory_storage, learner, monkeypatch):
+    user, headers = learner
+    get_progress = memory_storage.get_progress
+
+    async def slow_get_progress(user_id):
+        # Yield like a real database round trip so concurrent writes could interleave
+        progress = await get_progress(user_id)
+        await asyncio.sleep(0.01)
+        return progress
+
+    monkeypatch.setattr(memory_storage, "get_progress", slow_get_progress)
+    requests = [
+        {"id": f"s{i}", "method": "POST", "path": "/api/progress/section",
+         "body": {"section_id": f"section-{i}", "module_id": "pm-basics", "completed": True}}
+        for i in range(3)
+    ] + [
+        {"id": f"a{i}", "method": "POST", "path": "/api/progress/assessment",
+         "body": {"assessment_id": f"quiz-{i}", "answers": {}, "score": 80}}
+        for i in range(3)
+    ]
+
+    responses = run_batch(headers, requests)
+
+    assert [r["status"] for r in responses] == [200] * 6
+    progress = asyncio.run(memory_storage.get_progress(user["_id"]))
+    assert progress["completed_sections"] == ["section-0", "section-1", "section-2"]
+    assert [a["assessment_id"] for a in progress["assessment_scores"]] == ["quiz-0", "quiz-1", "quiz-2"]
+
+def test_responses_keep_request_order(memory_storage, learner):
+    _, headers = learner
+    requests = [
+        {"id": "read-1", "method": "GET", "path": "/api/progress"},
+        {"id": "write", "method": "POST", "path": "/api/progress/section",
+         "body": {"section_id": "intro", "module_id": "pm-basics", "completed": True}},
+        {"id": "read-2", "method": "GET", "path": "/api/progress"},
+    ]
+
+    responses = run_batch(headers, requests)
+
+    assert [r["id"] for r in responses] == ["read-1", "write", "read-2"]
+    assert responses[0]["body"]["completed_sections"] == []
+    assert responses[2]["body"]["completed_sections"] == ["intro"]
+
+def capture_sub_events(monkeypatch):
+    events = []
+
+    async def capturing_handler(event, context):
+        events.append(event)
+        return {"statusCode": 200, "body": "{}"}
+
+    monkeypatch.setattr(batch, "get_route_handler", lambda module_name: capturing_handler)
+    return events
+
+def test_idempotency_keys_reach_batched_writes(memory_storage, learner, monkeypatch):
+    _, headers = learner
+    events = capture_sub_events(monkeypatch)
+    requests = [
+        {"method": "GET", "path": "/api/progress"},
+        {"method": "POST", "path": "/api/tools/rice-calculation", "body": {}},
+        {"method": "POST", "path": "/api/progress/assessment", "body": {}, "idempotency_key": "own-key"},
+    ]
+
+    run_batch({**headers, "Idempotency-Key": "batch-1"}, requests)
+
+    keys = [event["headers"].get("Idempotency-Key") for event in events]
+    assert keys == [None, "batch-1:1", "own-key"]
+
+    events.clear()
+    run_batch(headers, requests)
+    assert [event["headers"].get("Idempotency-Key") for event in events] == [None, None, "own-key"]
+
+def test_query_string_in_path_becomes_parameters(memory_storage, learner, monkeypatch):
+    _, headers = learner
+    events = capture_sub_events(monkeypatch)
+
+    responses = run_batch(headers, [
+        {"method": "GET", "path": "/api/tools/rice-history?limit=5&offset=10", "query": {"offset": "20"}},
+    ])
+
+    assert responses[0]["status"] == 200
+    assert events[0]["path"] == "/api/tools/rice-history"
+    assert events[0]["queryStringParameters"] == {"limit": "5", "offset": "20"}
@@ -0,0 +1,125 @@
+import asyncio
+import importlib
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import ServerSelectionTimeoutError
+
+from _api_temp.utils import resilience
+from _api_temp.utils.resilience import DatabaseUnavailableError
+from _api_temp.utils.response import buffer_streaming_response
+from _api_temp.utils.write_queue import run_streaming_handler
+
+export = importlib.import_module("_api_temp.tools.export")
+
+class FakeCursor:
+    """Generates documents on demand, like a driver cursor fetching batches"""
+
+    def __init__(self, count, fail_after=None):
+        self.remaining = count
+        self.fail_after = fail_after
+        self.served = 0
+
+    async def to_list(self, length):
+        if self.fail_after is not None and self.served >= self.fail_after:
+            raise ServerSelectionTimeoutError("No servers found yet")
+        size = min(length, self.remaining)
+        self.remaining -= size
+        self.served += size
+        now = datetime(2026, 1, 1)
+        return [
+            {"_id": ObjectId(), "feature_name": "Feature", "reach": 1000, "impact": 2,
+             "confidence": 80, "effort": 3, "score": 533.33, "created_at": now}
+            for _ in range(size)
+        ]
+
+def rss_kb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+def test_million_row_export_stays_under_rss_ceiling(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+
+    async def consume():
+        baseline = peak = rss_kb()
+        rows = size = 0
+        async for chunk in export.stream_export(FakeCursor(1_000_000), export.RICE_EXPORT_FIELDS, "csv"):
+            rows += chunk.count("\n")
+            size += len(chunk)
+            peak = max(peak, rss_kb())
+        return baseline, peak, rows, size
+
+    baseline, peak, rows, size = asyncio.run(consume())
+
+    assert rows == 1_000_001
+    # About 73 MB of CSV went through; only a chunk at a time may be resident
+    assert size > 70_000_000
+    assert peak - baseline < 20_000
+
+def test_unreachable_database_is_a_503_not_an_exception(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+
+    async def first_chunk():
+        return await export.stream_export(FakeCursor(10, fail_after=0), export.RICE_EXPORT_FIELDS, "csv").__anext__()
+
+    with pytest.raises(DatabaseUnavailableError):
+        asyncio.run(first_chunk())
+
+def test_failure_mid_stream_becomes_a_503_when_buffered(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+
+    async def handler():
+        chunks = export.stream_export(FakeCursor(5000, fail_after=1000), export.RICE_EXPORT_FIELDS, "ndjson")
+        return export.streaming_response(chunks, "application/x-ndjson")
+
+    response = asyncio.run(buffer_streaming_response(handler()))
+
+    assert response["statusCode"] == 503
+    assert "Retry-After" in response["headers"]
+
+def test_buffered_export_is_capped(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+
+    async def handler():
+        chunks = export.stream_export(FakeCursor(100_000), export.RICE_EXPORT_FIELDS, "ndjson")
+        return export.streaming_response(chunks, "application/x-ndjson")
+
+    response = asyncio.run(buffer_streaming_response(handler(), export.MAX_BUFFERED_EXPORT_BYTES))
+
+    assert response["statusCode"] == 413
+    assert json.loads(response["body"])["error"] == "Response too large"
+
+def test_server_mode_streams_past_the_buffer_cap(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    monkeypatch.setenv("DEPLOYMENT_MODE", "server")
+    cursor = FakeCursor(100_000)
+
+    async def handler():
+        chunks = export.stream_export(cursor, export.RICE_EXPORT_FIELDS, "ndjson")
+        return export.streaming_response(chunks, "application/x-ndjson")
+
+    response = run_streaming_handler(handler(), export.MAX_BUFFERED_EXPORT_BYTES)
+
+    assert response["statusCode"] == 200
+    # Chunks are read from the cursor only as the host asks for them
+    first = next(response["body"])
+    assert cursor.served < 100_000
+    size = len(first) + sum(len(chunk) for chunk in response["body"])
+    assert size > export.MAX_BUFFERED_EXPORT_BYTES
+    assert cursor.served == 100_000
+
+def test_serverless_mode_buffers_with_the_cap(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    monkeypatch.setenv("DEPLOYMENT_MODE", "serverless")
+
+    async def handler():
+        chunks = export.stream_export(FakeCursor(100_000), export.RICE_EXPORT_FIELDS, "ndjson")
+        return export.streaming_response(chunks, "application/x-ndjson")
+
+    response = run_streaming_handler(handler(), export.MAX_BUFFERED_EXPORT_BYTES)
+
+    assert response["statusCode"] == 413
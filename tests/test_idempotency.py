@@ -0,0 +1,149 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
+
+from _api_temp.utils import idempotency, indexes, resilience
+from _api_temp.utils.auth import create_access_token
+from _api_temp.utils.response import success_response
+
+class FakeKeys:
+    """Just enough of a collection for the idempotency store"""
+
+    def __init__(self, unreachable=False):
+        self.documents = {}
+        self.unreachable = unreachable
+
+    def _check(self):
+        if self.unreachable:
+            raise ServerSelectionTimeoutError("No servers found yet")
+
+    def _matches(self, document, query):
+        return all(document.get(field) == value for field, value in query.items())
+
+    async def create_indexes(self, models):
+        self._check()
+
+    async def insert_one(self, document):
+        self._check()
+        if document["_id"] in self.documents:
+            raise DuplicateKeyError("duplicate key")
+        self.documents[document["_id"]] = dict(document)
+
+    async def find_one(self, query):
+        self._check()
+        document = self.documents.get(query["_id"])
+        return dict(document) if document else None
+
+    async def find_one_and_update(self, query, update):
+        self._check()
+        document = self.documents.get(query["_id"])
+        if document is None or not self._matches(document, query):
+            return None
+        previous = dict(document)
+        document.update(update["$set"])
+        return previous
+
+    async def update_one(self, query, update):
+        self._check()
+        document = self.documents.get(query["_id"])
+        if document is not None and self._matches(document, query):
+            document.update(update["$set"])
+
+    async def delete_one(self, query):
+        self._check()
+        document = self.documents.get(query["_id"])
+        if document is not None and self._matches(document, query):
+            del self.documents[query["_id"]]
+
+class FakeDatabase:
+    def __init__(self, keys):
+        self.idempotency_keys = keys
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+@pytest.fixture
+def keys(monkeypatch):
+    keys = FakeKeys()
+    storage = SimpleNamespace(db=FakeDatabase(keys))
+
+    async def get_storage():
+        return storage
+
+    monkeypatch.setattr(idempotency, "get_storage", get_storage)
+    monkeypatch.setattr(indexes, "_ensured_collections", set())
+    monkeypatch.setattr(idempotency, "_response_cache", type(idempotency._response_cache)())
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    return keys
+
+def post(handler, key="key-1"):
+    token = create_access_token({"sub": "user-1"})
+    event = {
+        "httpMethod": "POST",
+        "headers": {"Authorization": f"Bearer {token}", "Idempotency-Key": key},
+        "body": json.dumps({"feature_name": "Search"})
+    }
+    return asyncio.run(handler(event, None))
+
+def counting_handler():
+    calls = []
+
+    @idempotency.idempotent("tools/test")
+    async def handler(event, context):
+        calls.append(event)
+        return success_response({"call": len(calls)})
+
+    return handler, calls
+
+def test_unreachable_key_store_answers_503(keys):
+    keys.unreachable = True
+    handler, calls = counting_handler()
+
+    response = post(handler)
+
+    assert response["statusCode"] == 503
+    assert "Retry-After" in response["headers"]
+    assert calls == []
+
+def test_key_left_by_a_dead_process_is_reclaimed_after_the_lease(keys):
+    handler, calls = counting_handler()
+    stale = datetime.utcnow() - timedelta(seconds=idempotency.IDEMPOTENCY_LEASE_SECONDS + 1)
+    keys.documents["tools/test:user-1:key-1"] = {
+        "_id": "tools/test:user-1:key-1", "fingerprint": "old", "status": "in_progress",
+        "claimed_at": stale, "created_at": stale
+    }
+
+    response = post(handler)
+
+    assert response["statusCode"] == 200
+    assert len(calls) == 1
+    assert keys.documents["tools/test:user-1:key-1"]["status"] == "completed"
+
+def test_key_within_its_lease_is_still_in_progress(keys, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    handler, calls = counting_handler()
+    now = datetime.utcnow()
+    keys.documents["tools/test:user-1:key-1"] = {
+        "_id": "tools/test:user-1:key-1", "fingerprint": "old", "status": "in_progress",
+        "claimed_at": now, "created_at": now
+    }
+
+    response = post(handler)
+
+    assert response["statusCode"] == 409
+    assert calls == []
+
+def test_retries_replay_the_first_response(keys):
+    handler, calls = counting_handler()
+
+    first = post(handler)
+    idempotency._response_cache.clear()
+    second = post(handler)
+
+    assert len(calls) == 1
+    assert json.loads(second["body"]) == json.loads(first["body"])
+    assert second["headers"]["Idempotent-Replayed"] == "true"
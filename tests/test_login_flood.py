@@ -0,0 +1,66 @@
+import asyncio
+import importlib
+import json
+import time
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from _api_temp.utils import rate_limit
+from _api_temp.utils.auth import get_password_hash
+
+login = importlib.import_module("_api_temp.auth.login")
+
+FLOOD_REQUESTS = 100
+
+def login_event(email, password, ip):
+    return {
+        "httpMethod": "POST",
+        "headers": {"X-Forwarded-For": ip},
+        "body": json.dumps({"email": email, "password": password})
+    }
+
+async def timed_login(event):
+    started = time.perf_counter()
+    response = await login.handler(event, None)
+    return response, time.perf_counter() - started
+
+@pytest.fixture
+def accounts(memory_storage, monkeypatch):
+    for limit in (rate_limit.LOGIN_IP_LIMIT, rate_limit.LOGIN_EMAIL_LIMIT):
+        monkeypatch.setattr(limit, "_bucket", rate_limit.TokenBucket(limit.limit, limit.limit / limit.period))
+
+    now = datetime.utcnow()
+    for email in ("victim@example.com", "legit@example.com"):
+        asyncio.run(memory_storage.insert_user({
+            "_id": ObjectId(), "email": email, "password": get_password_hash("correct-horse"),
+            "name": "User", "role": "learner", "created_at": now, "updated_at": now, "last_login": None
+        }))
+
+def test_flood_is_throttled_and_other_clients_stay_fast(accounts):
+    # What one bcrypt check costs on this machine, without a flood
+    baseline = asyncio.run(timed_login(login_event("legit@example.com", "correct-horse", "198.51.100.7")))[1]
+    rate_limit.LOGIN_IP_LIMIT._bucket = rate_limit.TokenBucket(20, 20 / 60)
+
+    async def flood_and_login():
+        flood = [
+            asyncio.create_task(timed_login(login_event("victim@example.com", "guess", "203.0.113.9")))
+            for _ in range(FLOOD_REQUESTS)
+        ]
+        await asyncio.sleep(0)
+        legit = await timed_login(login_event("legit@example.com", "correct-horse", "198.51.100.8"))
+        return await asyncio.gather(*flood), legit
+
+    flood, (legit_response, legit_latency) = asyncio.run(flood_and_login())
+
+    statuses = [response["statusCode"] for response, _ in flood]
+    throttled = [response for response, _ in flood if response["statusCode"] == 429]
+    # Only the per-email allowance reaches bcrypt; the rest are turned away up front
+    assert statuses.count(401) <= rate_limit.LOGIN_EMAIL_LIMIT.limit
+    assert len(throttled) == FLOOD_REQUESTS - statuses.count(401)
+    assert all(int(response["headers"]["Retry-After"]) >= 1 for response in throttled)
+
+    assert legit_response["statusCode"] == 200, legit_response
+    # The flood holds at most its per-client share of bcrypt slots at a time
+    assert legit_latency < baseline * (rate_limit.BCRYPT_MAX_IN_FLIGHT_PER_CLIENT + 2)
@@ -0,0 +1,106 @@
+import asyncio
+import importlib
+import json
+
+from bson import ObjectId
+
+from _api_temp.utils import onboarding
+from _api_temp.utils.resilience import DatabaseUnavailableError
+
+import_users_endpoint = importlib.import_module("_api_temp.admin.import-users")
+
+def csv_file(count, start=0):
+    rows = [f"user{i}@example.com,User {i},password{i}" for i in range(start, start + count)]
+    return "\n".join(["email,name,password", *rows])
+
+def fake_hashing(monkeypatch, events):
+    """Replace bcrypt with a cheap stand-in that logs each batch"""
+    async def hash_all(passwords):
+        events.append(("hash", len(passwords)))
+        await asyncio.sleep(0)
+        return [f"hashed:{password}" for password in passwords]
+
+    monkeypatch.setattr(onboarding, "hash_all", hash_all)
+
+def test_hashes_and_writes_chunk_by_chunk(memory_storage, monkeypatch):
+    events = []
+    fake_hashing(monkeypatch, events)
+    monkeypatch.setattr(onboarding, "IMPORT_CHUNK_SIZE", 2)
+    insert_users = memory_storage.insert_users
+
+    async def logged_insert_users(users):
+        events.append(("write", len(users)))
+        return await insert_users(users)
+
+    monkeypatch.setattr(memory_storage, "insert_users", logged_insert_users)
+
+    report = asyncio.run(onboarding.import_users(memory_storage, csv_file(5), "csv"))
+
+    assert report["created"] == 5
+    assert report["missing_progress"] == []
+    # The first chunk is written before the last one is hashed
+    assert events.index(("write", 2)) < events.index(("hash", 1))
+    assert [size for kind, size in events if kind == "write"] == [2, 2, 1]
+    user = asyncio.run(memory_storage.get_user_by_email("user4@example.com"))
+    assert user["password"] == "hashed:password4"
+    assert asyncio.run(memory_storage.get_progress(user["_id"])) is not None
+
+def test_reports_users_created_without_progress(memory_storage, monkeypatch):
+    fake_hashing(monkeypatch, [])
+    monkeypatch.setattr(onboarding, "IMPORT_CHUNK_SIZE", 2)
+    insert_progress_many = memory_storage.insert_progress_many
+    calls = []
+
+    async def failing_second_chunk(documents):
+        calls.append(len(documents))
+        if len(calls) == 2:
+            raise DatabaseUnavailableError(1)
+        return await insert_progress_many(documents)
+
+    monkeypatch.setattr(memory_storage, "insert_progress_many", failing_second_chunk)
+
+    report = asyncio.run(onboarding.import_users(memory_storage, csv_file(3), "csv"))
+
+    assert report["created"] == 3
+    assert report["errors"] == []
+    assert [(entry["row"], entry["email"]) for entry in report["missing_progress"]] == [(4, "user2@example.com")]
+    user = asyncio.run(memory_storage.get_user_by_email("user2@example.com"))
+    assert report["missing_progress"][0]["user_id"] == str(user["_id"])
+    assert asyncio.run(memory_storage.get_progress(user["_id"])) is None
+
+def test_failed_user_insert_is_reported_per_row(memory_storage, monkeypatch):
+    fake_hashing(monkeypatch, [])
+
+    async def unavailable(users):
+        raise DatabaseUnavailableError(1)
+
+    monkeypatch.setattr(memory_storage, "insert_users", unavailable)
+
+    report = asyncio.run(onboarding.import_users(memory_storage, csv_file(2), "csv"))
+
+    assert report["created"] == 0
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert all("may not have been created" in error["error"] for error in report["errors"])
+
+def test_endpoint_caps_rows_below_the_command_line(memory_storage, admin, monkeypatch):
+    fake_hashing(monkeypatch, [])
+    _, headers = admin
+    event = {"httpMethod": "POST", "headers": {**headers, "Content-Type": "text/csv"},
+             "body": csv_file(onboarding.MAX_REQUEST_IMPORT_ROWS + 1)}
+
+    response = asyncio.run(import_users_endpoint.handler(event, None))
+
+    assert response["statusCode"] == 400
+    assert str(onboarding.MAX_REQUEST_IMPORT_ROWS) in json.loads(response["body"])["detail"]
+    assert onboarding.MAX_REQUEST_IMPORT_ROWS < onboarding.MAX_IMPORT_ROWS
+
+def test_first_progress_read_creates_the_shared_default(memory_storage):
+    progress_index = importlib.import_module("_api_temp.progress.index")
+    user_id = ObjectId()
+
+    created = asyncio.run(progress_index.get_user_progress(memory_storage, user_id))
+
+    expected = onboarding.new_progress_document(user_id, created["created_at"])
+    assert {k: v for k, v in created.items() if k != "_id"} == {k: v for k, v in expected.items() if k != "_id"}
+    assert set(created["module_progress"]) == set(onboarding.MODULE_IDS)
+    assert asyncio.run(memory_storage.get_progress(user_id)) == created
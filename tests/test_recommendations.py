@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from _api_temp.utils import recommendations, resilience
+from _api_temp.utils.recommendations import MANIFEST_FILE, Recommender, build_snapshot, get_recommender
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def batch_size(self, size):
+        return self
+
+    def max_time_ms(self, limit):
+        self.limit = limit
+        return self
+
+    async def __aiter__(self):
+        for document in self.documents:
+            yield document
+
+class FakeDatabase:
+    def __init__(self, documents):
+        self.user_progress = self
+        self.documents = documents
+
+    def find(self, query, projection):
+        return FakeCursor(self.documents)
+
+def progress(sections, scores=()):
+    return {
+        "completed_sections": sections,
+        "assessment_scores": [
+            {"assessment_id": assessment_id, "score": score, "completed_at": datetime(2026, 1, 1)}
+            for assessment_id, score in scores
+        ]
+    }
+
+# "intro" is usually followed by "metrics"; learners who pass quiz-ai did "ai"
+LEARNERS = [
+    progress(["intro", "metrics"]),
+    progress(["intro", "metrics"]),
+    progress(["intro", "metrics", "ai"], [("quiz-ai", 90)]),
+    progress(["intro", "discovery"]),
+    progress(["ai"], [("quiz-ai", 80)]),
+    progress(["discovery"], [("quiz-ai", 20)]),
+]
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    monkeypatch.setattr(recommendations, "_recommender", None)
+    monkeypatch.setattr(recommendations, "_manifest_mtime", None)
+
+def build(path, documents):
+    return asyncio.run(build_snapshot(FakeDatabase(documents), str(path)))
+
+def test_ranks_co_completed_sections_first(tmp_path):
+    assert build(tmp_path, LEARNERS) == {"sections": 4, "assessments": 1, "users": 6}
+    recommender = Recommender(str(tmp_path))
+
+    ranked = [r["section_id"] for r in recommender.recommend(["intro"], [], k=3)]
+
+    assert ranked[0] == "metrics"
+    assert "intro" not in ranked
+
+def test_weak_assessments_boost_their_sections(tmp_path):
+    build(tmp_path, LEARNERS)
+    recommender = Recommender(str(tmp_path))
+
+    ranked = recommender.recommend([], [{"assessment_id": "quiz-ai", "score": 30}], k=1)
+
+    # Without the weak score the most popular section, "intro", would come first
+    assert ranked[0]["section_id"] == "ai"
+
+def test_new_learners_get_popular_sections(tmp_path):
+    build(tmp_path, LEARNERS)
+
+    ranked = [r["section_id"] for r in Recommender(str(tmp_path)).recommend([], [], k=2)]
+
+    assert ranked == ["intro", "metrics"]
+
+def test_empty_snapshot_recommends_nothing(tmp_path):
+    assert build(tmp_path, []) == {"sections": 0, "assessments": 0, "users": 0}
+
+    assert Recommender(str(tmp_path)).recommend(["intro"], [], k=5) == []
+
+def test_missing_manifest_means_no_recommender(tmp_path):
+    assert get_recommender(str(tmp_path)) is None
+    assert get_recommender(str(tmp_path / "never-built")) is None
+
+def test_rebuild_is_served_without_a_restart(tmp_path):
+    build(tmp_path, LEARNERS)
+    first = get_recommender(str(tmp_path))
+    assert get_recommender(str(tmp_path)) is first
+
+    build(tmp_path, [progress(["intro", "pricing"])] * 3)
+    second = get_recommender(str(tmp_path))
+
+    assert second.version != first.version
+    assert [r["section_id"] for r in second.recommend(["intro"], [], k=1)] == ["pricing"]
+    # The previous version stays on disk for readers that loaded its manifest
+    with open(os.path.join(tmp_path, MANIFEST_FILE)) as manifest_file:
+        assert json.load(manifest_file)["version"] == second.version
+    assert sorted(entry.name for entry in os.scandir(tmp_path) if entry.is_dir()) == sorted([first.version, second.version])
+
+def test_only_recent_versions_are_kept(tmp_path):
+    for _ in range(4):
+        build(tmp_path, LEARNERS)
+
+    assert len([entry for entry in os.scandir(tmp_path) if entry.is_dir()]) == recommendations.KEPT_VERSIONS
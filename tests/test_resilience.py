@@ -0,0 +1,176 @@
+import asyncio
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect, ConnectionFailure
+
+from _api_temp.utils import resilience
+from _api_temp.utils.database import DB_PROFILES, DEFAULT_PROFILE, max_time_ms, profile_settings, with_profile
+from _api_temp.utils.resilience import (
+    CircuitBreaker, DatabaseUnavailableError, RetryBudget, resilient_call, resilient_read, resilient_write
+)
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(resilience, "mongo_breaker", CircuitBreaker(min_calls=4, open_seconds=0.05))
+    monkeypatch.setattr(resilience, "retry_budget", RetryBudget())
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY_SECONDS", 0.001)
+    monkeypatch.setitem(DB_PROFILES, "test", {**DB_PROFILES["primary"], "deadline_ms": 200})
+
+def flaky(failures, error=ConnectionFailure, result="ok"):
+    """Operation failing `failures` times with `error`, then returning result"""
+    calls = []
+
+    async def operation():
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise error("injected")
+        return result
+
+    return operation, calls
+
+def test_reads_retry_transient_failures():
+    operation, calls = flaky(2, AutoReconnect)
+
+    assert asyncio.run(resilient_read(operation, "test")) == "ok"
+    assert len(calls) == 3
+
+def test_reads_give_up_after_their_retries():
+    operation, calls = flaky(10)
+
+    with pytest.raises(DatabaseUnavailableError):
+        asyncio.run(resilient_read(operation, "test"))
+    assert len(calls) == resilience.READ_RETRIES + 1
+
+def test_writes_are_not_retried():
+    operation, calls = flaky(1)
+
+    with pytest.raises(DatabaseUnavailableError) as raised:
+        asyncio.run(resilient_write(operation, "test"))
+    assert len(calls) == 1
+    assert raised.value.retry_after >= 1
+
+def test_deadline_bounds_a_hung_call():
+    async def hang():
+        await asyncio.sleep(10)
+
+    started = time.monotonic()
+    with pytest.raises(DatabaseUnavailableError):
+        asyncio.run(resilient_call(hang, "test"))
+    assert time.monotonic() - started < 0.5
+
+def test_request_errors_pass_through_and_do_not_trip_the_breaker():
+    operation, _ = flaky(100, ValueError)
+
+    for _ in range(10):
+        with pytest.raises(ValueError):
+            asyncio.run(resilient_write(operation, "test"))
+    assert resilience.mongo_breaker.state == "closed"
+
+def test_exhausted_retry_budget_stops_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "retry_budget", RetryBudget(capacity=0))
+    operation, calls = flaky(1)
+
+    with pytest.raises(DatabaseUnavailableError):
+        asyncio.run(resilient_read(operation, "test"))
+    assert len(calls) == 1
+
+def test_breaker_opens_then_fails_fast():
+    operation, calls = flaky(100)
+    for _ in range(4):
+        with pytest.raises(DatabaseUnavailableError):
+            asyncio.run(resilient_write(operation, "test"))
+    assert resilience.mongo_breaker.state == "open"
+
+    with pytest.raises(DatabaseUnavailableError):
+        asyncio.run(resilient_write(operation, "test"))
+    # Rejected without calling the database
+    assert len(calls) == 4
+    assert resilience.mongo_breaker.get_metrics()["rejected"] == 1
+
+def test_half_open_probe_closes_or_reopens_the_breaker():
+    breaker = CircuitBreaker(min_calls=2, open_seconds=0.05)
+    breaker.record(failed=True)
+    breaker.record(failed=True)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record(failed=True)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(failed=False)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+def test_breaker_ignores_failures_outside_its_window():
+    breaker = CircuitBreaker(min_calls=3, window_seconds=0.05)
+    breaker.record(failed=True)
+    time.sleep(0.06)
+    # 1 of 3 recent calls failed; counting the expired one would make it 2 of 4
+    breaker.record(failed=False)
+    breaker.record(failed=False)
+    breaker.record(failed=True)
+
+    assert breaker.state == "closed"
+
+def test_shared_rate_limit_is_guarded(monkeypatch):
+    from _api_temp.utils import indexes, rate_limit
+
+    class Unreachable:
+        def __getattr__(self, name):
+            return self
+
+        def __getitem__(self, name):
+            return self
+
+        async def create_indexes(self, models):
+            raise ConnectionFailure("injected")
+
+    monkeypatch.setattr(indexes, "_ensured_collections", set())
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKEND", "mongo")
+    limit = rate_limit.RateLimit("test", limit=5, period=60)
+
+    with pytest.raises(DatabaseUnavailableError):
+        asyncio.run(limit.check(Unreachable(), "203.0.113.9"))
+
+# Intended settings per profile: (read preference, write w, max_time_ms, deadline_ms)
+EXPECTED_PROFILES = {
+    "primary": ("primary", "majority", 2000, 2500),
+    "auth": ("primary", "majority", 1000, 1500),
+    "background": ("primary", 1, 2000, 2500),
+    "history": ("secondaryPreferred", "majority", 2000, 2500),
+    "export": ("secondaryPreferred", "majority", 120000, 125000),
+    "admin": ("primary", "majority", 60000, 65000),
+}
+
+@pytest.mark.parametrize("profile", sorted(EXPECTED_PROFILES))
+def test_profiles_resolve_to_their_settings(profile):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    db = with_profile(AsyncIOMotorClient("mongodb://localhost:1", connect=False)["app"], profile)
+    read_preference, w, limit, deadline = EXPECTED_PROFILES[profile]
+
+    assert db.read_preference.mongos_mode == read_preference
+    assert db.write_concern.document["w"] == w
+    assert max_time_ms(profile) == limit
+    assert profile_settings(profile)["deadline_ms"] == deadline
+    if read_preference == "secondaryPreferred":
+        assert db.read_preference.max_staleness == 90
+
+def test_unknown_profile_falls_back_to_the_default(caplog):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    db = with_profile(AsyncIOMotorClient("mongodb://localhost:1", connect=False)["app"], "no-such-profile")
+
+    assert profile_settings("no-such-profile") is DB_PROFILES[DEFAULT_PROFILE]
+    assert max_time_ms("no-such-profile") == DB_PROFILES[DEFAULT_PROFILE]["max_time_ms"]
+    assert db.read_preference.mongos_mode == "primary"
+    assert "Unknown database profile 'no-such-profile'" in caplog.text
+    # resilient_call applies the default profile's deadline too
+    assert asyncio.run(resilient_write(lambda: asyncio.sleep(0, "ok"), "no-such-profile")) == "ok"
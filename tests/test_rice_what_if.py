@@ -0,0 +1,90 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from _api_temp.utils.models import RiceWhatIfRequest
+
+what_if = importlib.import_module("_api_temp.tools.rice-what-if")
+
+def feature(name, reach=1000, impact=2, confidence=80, effort=2):
+    return {"feature_name": name, "reach": reach, "impact": impact, "confidence": confidence, "effort": effort}
+
+def by_name(result):
+    return {f["feature_name"]: f for f in result["features"]}
+
+def test_fixed_inputs_match_the_point_score():
+    request = RiceWhatIfRequest(features=[feature("a"), feature("b", reach=500)], method="grid", grid_steps=3)
+
+    result = by_name(what_if.analyze(request))
+
+    assert what_if.analyze(request)["scenarios"] == 3 ** 4
+    assert result["a"]["point_score"] == pytest.approx(800)
+    assert result["a"]["score"]["min"] == result["a"]["score"]["max"] == pytest.approx(800)
+    assert result["a"]["rank_stability"] == 1.0
+    assert (result["a"]["point_rank"], result["b"]["point_rank"]) == (1, 2)
+
+def test_grid_reaches_both_ends_of_every_range():
+    ranged = feature("a", reach={"min": 100, "max": 200}, effort={"min": 1, "max": 4})
+    request = RiceWhatIfRequest(features=[ranged], method="grid", grid_steps=4)
+
+    score = what_if.analyze(request)["features"][0]["score"]
+
+    # reach * impact * confidence / 100 / effort at the extremes
+    assert score["min"] == pytest.approx(100 * 2 * 0.8 / 4)
+    assert score["max"] == pytest.approx(200 * 2 * 0.8 / 1)
+
+def test_monte_carlo_samples_stay_within_bounds():
+    ranged = feature("a", reach={"min": 100, "max": 200},
+                     impact={"min": 1, "max": 3, "mode": 2.5, "distribution": "triangular"})
+    request = RiceWhatIfRequest(features=[ranged, feature("b", reach=150)], samples=5000, seed=7)
+
+    a = by_name(what_if.analyze(request))["a"]
+
+    assert a["score"]["min"] >= 100 * 1 * 0.8 / 2 - 1e-3
+    assert a["score"]["max"] <= 200 * 3 * 0.8 / 2 + 1e-3
+    assert a["score"]["p5"] < a["score"]["p50"] < a["score"]["p95"]
+    assert 0 < a["top_k_probability"] <= 1
+    assert 1 <= a["rank"]["expected"] <= 2
+
+def test_monte_carlo_is_deterministic_for_a_seed():
+    features = [feature("a", reach={"min": 100, "max": 2000}), feature("b", confidence={"min": 10, "max": 100})]
+
+    first = what_if.analyze(RiceWhatIfRequest(features=features, samples=500, seed=42))
+    again = what_if.analyze(RiceWhatIfRequest(features=features, samples=500, seed=42))
+    other = what_if.analyze(RiceWhatIfRequest(features=features, samples=500, seed=43))
+
+    assert first == again
+    assert first != other
+
+@pytest.mark.parametrize("field, value", [
+    ("reach", {"min": 200, "max": 100}),
+    ("reach", -1),
+    ("impact", {"min": 1, "max": 11}),
+    ("confidence", {"min": 50, "max": 101}),
+    ("effort", {"min": 0, "max": 2}),
+    ("impact", {"min": 1, "max": 2, "mode": 3, "distribution": "triangular"}),
+])
+def test_out_of_range_inputs_are_rejected(field, value):
+    with pytest.raises(ValidationError):
+        RiceWhatIfRequest(features=[feature("a", **{field: value})])
+
+def test_handler_caps_features_times_scenarios(learner, monkeypatch):
+    _, headers = learner
+    monkeypatch.setattr(what_if, "MAX_WHAT_IF_CELLS", 1000)
+
+    def post(body):
+        event = {"httpMethod": "POST", "headers": headers, "body": json.dumps(body)}
+        return asyncio.run(what_if.handler(event, None))
+
+    allowed = post({"features": [feature("a"), feature("b")], "samples": 500})
+    too_large = post({"features": [feature("a"), feature("b")], "samples": 501})
+    grid = post({"features": [feature("a")], "method": "grid", "grid_steps": 6})
+
+    assert allowed["statusCode"] == 200
+    assert too_large["statusCode"] == 400
+    assert "1002" in json.loads(too_large["body"])["detail"]
+    # 6 ** 4 = 1296 grid scenarios for a single feature
+    assert grid["statusCode"] == 400
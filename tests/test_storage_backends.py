@@ -0,0 +1,230 @@
+"""Every StorageBackend method, run against each backend
+
+MongoDB runs when MONGO_URL points at a reachable server (a throwaway
+database is created and dropped per test); otherwise it is skipped.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from _api_temp.utils import indexes, resilience
+from _api_temp.utils.onboarding import new_progress_document
+from _api_temp.utils.storage import DuplicateEmailError, MemoryStorage, MongoStorage, SQLiteStorage
+from _api_temp.utils.write_queue import drain_all
+
+def mongo_available():
+    url = os.environ.get("MONGO_URL")
+    if not url:
+        return False
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    try:
+        MongoClient(url, serverSelectionTimeoutMS=1000).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+@pytest.fixture(params=["memory", "sqlite", "mongo"])
+def backend(request, tmp_path, monkeypatch):
+    """Run a scenario against a fresh backend: backend(scenario) where scenario(storage) is async"""
+    if request.param == "mongo" and not mongo_available():
+        pytest.skip("MONGO_URL is not set or the server is unreachable")
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    # Each test gets a fresh database, so its indexes must be created again
+    monkeypatch.setattr(indexes, "_ensured_collections", set())
+
+    def run(scenario):
+        async def with_storage():
+            if request.param == "memory":
+                return await scenario(MemoryStorage())
+            if request.param == "sqlite":
+                return await scenario(SQLiteStorage(str(tmp_path / "storage.sqlite3")))
+
+            # A client per event loop, since each test runs its own loop
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client = AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+            db = client[f"storage_conformance_{uuid.uuid4().hex[:12]}"]
+            try:
+                return await scenario(MongoStorage(db))
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+
+        return asyncio.run(with_storage())
+
+    return run
+
+def new_user(email, **fields):
+    now = datetime.utcnow().replace(microsecond=0)
+    return {"_id": ObjectId(), "email": email, "password": "not-a-real-hash", "name": "User",
+            "role": "learner", "created_at": now, "updated_at": now, "last_login": None, **fields}
+
+def owned(user_id, created_at, **fields):
+    return {"_id": ObjectId(), "user_id": user_id, "created_at": created_at, **fields}
+
+def test_users(backend):
+    async def scenario(storage):
+        user = new_user("a@example.com")
+        assert await storage.insert_user(user) == user["_id"]
+        with pytest.raises(DuplicateEmailError):
+            await storage.insert_user(new_user("a@example.com"))
+
+        assert (await storage.get_user_by_email("a@example.com"))["_id"] == user["_id"]
+        assert await storage.get_user_by_id(user["_id"]) == user
+        assert await storage.get_user_by_email("missing@example.com") is None
+        assert await storage.get_user_by_id(ObjectId()) is None
+
+        login = datetime(2026, 1, 2, 3, 4, 5)
+        await storage.update_user(user["_id"], {"name": "Renamed"})
+        await storage.update_user(user["_id"], {"last_login": login}, background=True)
+        await drain_all()
+        stored = await storage.get_user_by_id(user["_id"])
+        assert (stored["name"], stored["last_login"]) == ("Renamed", login)
+
+    backend(scenario)
+
+def test_update_after_duplicate_insert(backend):
+    async def scenario(storage):
+        user = new_user("dup@example.com")
+        await storage.insert_user(user)
+        await storage.insert_progress(new_progress_document(user["_id"], datetime.utcnow().replace(microsecond=0)))
+        with pytest.raises(DuplicateEmailError):
+            await storage.insert_user(new_user("dup@example.com"))
+
+        # A failed statement must not leave a transaction open for the next write
+        await storage.update_user(user["_id"], {"name": "After duplicate"})
+        await storage.update_progress(user["_id"], {"total_progress": 10.0})
+        assert (await storage.get_user_by_id(user["_id"]))["name"] == "After duplicate"
+        assert (await storage.get_progress(user["_id"]))["total_progress"] == 10.0
+
+    backend(scenario)
+
+def test_bulk_users(backend):
+    async def scenario(storage):
+        await storage.insert_user(new_user("taken@example.com"))
+
+        errors = await storage.insert_users([
+            new_user("b@example.com"), new_user("taken@example.com"), new_user("c@example.com")
+        ])
+
+        assert errors == {1: "Email already registered"}
+        emails = ["b@example.com", "c@example.com", "taken@example.com", "new@example.com"]
+        assert await storage.find_existing_emails(emails) == {"b@example.com", "c@example.com", "taken@example.com"}
+        assert await storage.find_existing_emails([]) == set()
+
+    backend(scenario)
+
+def test_progress(backend):
+    async def scenario(storage):
+        now = datetime.utcnow().replace(microsecond=0)
+        user_id, other_ids = ObjectId(), [ObjectId(), ObjectId()]
+        await storage.insert_progress(new_progress_document(user_id, now))
+        await storage.insert_progress_many([new_progress_document(other, now) for other in other_ids])
+        assert await storage.get_progress(ObjectId()) is None
+        assert [(await storage.get_progress(other))["user_id"] for other in other_ids] == other_ids
+
+        score = {"assessment_id": "quiz-1", "score": 80, "answers": {}, "completed_at": now}
+        await storage.update_progress(user_id, {"completed_sections": ["s1"], "total_progress": 5.0},
+                                      push_assessments=[score])
+        await storage.update_progress(user_id, {"last_accessed_module": "metrics"})
+
+        progress = await storage.get_progress(user_id)
+        assert progress["completed_sections"] == ["s1"]
+        assert progress["total_progress"] == 5.0
+        assert progress["last_accessed_module"] == "metrics"
+        assert progress["assessment_scores"] == [score]
+
+    backend(scenario)
+
+def test_concurrent_progress_updates_are_not_lost(backend):
+    async def scenario(storage):
+        now = datetime.utcnow().replace(microsecond=0)
+        user_id = ObjectId()
+        await storage.insert_progress(new_progress_document(user_id, now))
+
+        await asyncio.gather(*[
+            storage.update_progress(user_id, {"updated_at": now}, push_assessments=[
+                {"assessment_id": f"quiz-{i}", "score": i, "answers": {}, "completed_at": now}
+            ])
+            for i in range(20)
+        ])
+
+        progress = await storage.get_progress(user_id)
+        assert sorted(a["assessment_id"] for a in progress["assessment_scores"]) == sorted(f"quiz-{i}" for i in range(20))
+
+    backend(scenario)
+
+def test_history(backend):
+    async def scenario(storage):
+        user_id, other_id = ObjectId(), ObjectId()
+        start = datetime(2026, 1, 1)
+        calculations = [owned(user_id, start + timedelta(minutes=i), feature_name=f"f{i}", score=i) for i in range(5)]
+        for calculation in calculations:
+            assert await storage.insert_rice_calculation(calculation) == calculation["_id"]
+        await storage.insert_rice_calculation(owned(other_id, start, feature_name="other", score=0))
+
+        stories = [owned(user_id, start + timedelta(minutes=i), project_name=f"p{i}", stories=[]) for i in range(3)]
+        for record in stories:
+            assert await storage.insert_user_stories(record) == record["_id"]
+
+        newest = await storage.list_rice_calculations(user_id, 3)
+        assert [c["feature_name"] for c in newest] == ["f4", "f3", "f2"]
+        assert [r["project_name"] for r in await storage.list_user_stories(user_id, 10)] == ["p2", "p1", "p0"]
+        assert await storage.list_user_stories(other_id, 10) == []
+
+    backend(scenario)
+
+def test_database_profiles(backend):
+    async def scenario(storage):
+        if isinstance(storage, MongoStorage):
+            assert storage.database("history").name == storage.db.name
+        else:
+            assert storage.db is None
+            assert storage.database("background") is None
+
+    backend(scenario)
+
+class RecordingUsers:
+    """Stands in for db.users; records index creation and inserts"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def create_indexes(self, models):
+        self.calls.append(("create_indexes", [model.document for model in models]))
+
+    async def insert_one(self, user):
+        self.calls.append(("insert_one", user["email"]))
+        return type("InsertOneResult", (), {"inserted_id": user["_id"]})()
+
+    async def insert_many(self, users, ordered):
+        self.calls.append(("insert_many", len(users)))
+
+class FakeDatabase:
+    def __init__(self, users):
+        self.users = users
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+def test_mongo_inserts_ensure_unique_email_index(monkeypatch):
+    monkeypatch.setattr(indexes, "_ensured_collections", set())
+    monkeypatch.setattr(resilience, "mongo_breaker", resilience.CircuitBreaker())
+    calls = []
+    storage = MongoStorage(FakeDatabase(RecordingUsers(calls)))
+
+    async def scenario():
+        await storage.insert_user(new_user("a@example.com"))
+        await storage.insert_users([new_user("b@example.com")])
+
+    asyncio.run(scenario())
+
+    index_calls = [args for name, args in calls if name == "create_indexes"]
+    assert len(index_calls) == 1
+    assert index_calls[0][0]["key"] == {"email": 1} and index_calls[0][0]["unique"] is True
+    assert calls[0][0] == "create_indexes"
+    assert [name for name, _ in calls[1:]] == ["insert_one", "insert_many"]
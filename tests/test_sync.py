@@ -0,0 +1,29 @@
+import asyncio
+import importlib
+import json
+
+sync = importlib.import_module("_api_temp.progress.sync")
+
+def post_sync(headers, body):
+    event = {"httpMethod": "POST", "headers": headers, "body": json.dumps(body)}
+    response = asyncio.run(sync.handler(event, None))
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])
+
+def test_retried_sync_does_not_duplicate_assessments(memory_storage, learner):
+    user, headers = learner
+    body = {
+        "updates": [{"section_id": "section-1", "module_id": "pm-basics", "completed": True,
+                     "client_timestamp": "2026-01-05T10:00:00.123456+02:00"}],
+        "assessments": [
+            {"assessment_id": "quiz-1", "answers": {}, "score": 70, "client_timestamp": "2026-01-05T10:01:00.123456+02:00"},
+            {"assessment_id": "quiz-1", "answers": {}, "score": 90, "client_timestamp": "2026-01-05T10:05:00+02:00"}
+        ]
+    }
+
+    post_sync(headers, body)
+    post_sync(headers, body)
+
+    progress = asyncio.run(memory_storage.get_progress(user["_id"]))
+    assert progress["completed_sections"] == ["section-1"]
+    assert [a["score"] for a in progress["assessment_scores"]] == [70, 90]
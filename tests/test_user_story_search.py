@@ -0,0 +1,34 @@
+import asyncio
+import importlib
+import json
+
+from _api_temp.utils.search import search_terms
+
+search = importlib.import_module("_api_temp.tools.user-story-search")
+user_story = importlib.import_module("_api_temp.tools.user-story")
+
+def test_inflections_share_a_term():
+    assert search_terms("Add logging to the import job") == ["add", "log", "import", "job"]
+    assert search_terms("logged") == search_terms("logs") == search_terms("logging") == ["log"]
+    assert search_terms("stories") == search_terms("story") == ["story"]
+
+def test_story_and_document_level_match_the_same_terms():
+    pipeline = search.build_search_pipeline("user-1", {"q": "Logging reports"}, 50, 0)
+
+    match = pipeline[0]["$match"]
+    condition = pipeline[2]["$project"]["stories"]["$filter"]["cond"]["$and"][0]
+    assert match["stories.search_terms"] == {"$in": ["log", "report"]}
+    assert condition["$gt"][0]["$size"]["$setIntersection"][1] == ["log", "report"]
+
+def test_saved_stories_index_their_own_text_only(memory_storage, learner):
+    user, headers = learner
+    body = {"project_name": "Imports", "stories": [{"story": "Export reports", "category": "data", "priority": "high"}]}
+
+    saved = asyncio.run(user_story.handler({"httpMethod": "POST", "headers": headers, "body": json.dumps(body)}, None))
+    listed = asyncio.run(user_story.handler({"httpMethod": "GET", "headers": headers}, None))
+
+    assert saved["statusCode"] == 200
+    stored = asyncio.run(memory_storage.list_user_stories(user["_id"], 20))[0]["stories"][0]
+    # The "As a [user type], I want to ..." template is not searchable
+    assert stored["search_terms"] == ["export", "report"]
+    assert "search_terms" not in json.loads(listed["body"])["user_stories"][0]["stories"][0]
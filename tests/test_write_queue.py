@@ -0,0 +1,77 @@
+import asyncio
+import importlib
+import json
+import pathlib
+import re
+
+from _api_temp.utils import activity, analytics, write_queue as write_queue_module
+from _api_temp.utils.write_queue import run_handler, write_queue
+
+class FakeCollection:
+    def __init__(self):
+        self.bulk_writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(operations)
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+async def login_handler(db):
+    write_queue.enqueue(db, "users", "user-1", {"last_login": "now"})
+    return {"statusCode": 200}
+
+def test_serverless_flushes_before_returning(monkeypatch):
+    monkeypatch.setenv("DEPLOYMENT_MODE", "serverless")
+    db = FakeDatabase()
+
+    assert run_handler(login_handler(db)) == {"statusCode": 200}
+
+    assert len(db["users"].bulk_writes) == 1
+    assert write_queue.get_metrics()["depth"] == 0
+
+def test_server_mode_returns_before_the_flush(monkeypatch):
+    monkeypatch.setenv("DEPLOYMENT_MODE", "server")
+    db = FakeDatabase()
+
+    assert run_handler(login_handler(db)) == {"statusCode": 200}
+
+    # The write is still queued when the response is returned
+    assert db["users"].bulk_writes == []
+    assert write_queue.get_metrics()["depth"] == 1
+
+    loop = write_queue_module.get_server_loop()
+    asyncio.run_coroutine_threadsafe(write_queue_module.drain_all(), loop).result()
+    assert len(db["users"].bulk_writes) == 1
+
+def test_metrics_cover_every_buffer():
+    metrics = write_queue_module.get_metrics()
+
+    assert set(metrics) == {"WriteBehindQueue", "ActivityBuffer", "AnalyticsRecorder"}
+    assert metrics["ActivityBuffer"] == activity.activity_buffer.get_metrics()
+    assert {"depth", "dropped", "last_flush_ms"} <= set(metrics["WriteBehindQueue"])
+
+def test_metrics_endpoint_is_admin_only(admin, learner):
+    metrics_endpoint = importlib.import_module("_api_temp.admin.metrics")
+    _, admin_headers = admin
+    _, learner_headers = learner
+
+    denied = asyncio.run(metrics_endpoint.handler({"httpMethod": "GET", "headers": learner_headers}, None))
+    response = asyncio.run(metrics_endpoint.handler({"httpMethod": "GET", "headers": admin_headers}, None))
+
+    assert denied["statusCode"] == 403
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert "WriteBehindQueue" in body["buffers"]
+    assert body["database"]["breaker"]["state"] == "closed"
+
+def test_every_entry_point_runs_through_run_handler():
+    package = pathlib.Path(write_queue_module.__file__).parent.parent
+    entry_points = [path for path in package.glob("*/*.py") if path.parent.name != "utils" and "def main(" in path.read_text()]
+
+    assert len(entry_points) >= 20
+    for path in entry_points:
+        main = path.read_text().split("def main(", 1)[1]
+        assert re.search(r"run_\w*handler\(", main) and "asyncio.run(" not in main, path.name